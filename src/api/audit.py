@@ -0,0 +1,541 @@
+import fcntl
+import gzip
+import json
+import logging
+import os
+import queue
+import sqlite3
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator, Optional
+
+from src.api.metrics import (
+    audit_records_written_total,
+    audit_records_dropped_total,
+    audit_queue_depth,
+    audit_lag_seconds,
+    audit_write_errors_total,
+)
+
+logger = logging.getLogger("ml_inference_system")
+
+# Every record is framed as a 4-byte little-endian length followed by compact JSON
+RECORD_HEADER = struct.Struct("<I")
+
+
+def encode_record(record: dict) -> bytes:
+    payload = json.dumps(record, separators=(",", ":"), default=str).encode("utf-8")
+    return RECORD_HEADER.pack(len(payload)) + payload
+
+
+def read_segment(path: Path) -> Iterator[tuple[int, dict]]:
+    """Yields (offset, record) pairs from an open (.log) or closed (.log.gz) segment."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, 'rb') as f:
+        offset = 0
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            (length,) = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                # Torn write at the tail of a segment after a crash
+                return
+            yield offset, json.loads(payload)
+            offset += RECORD_HEADER.size + length
+
+
+def read_records_at(path: Path, offsets: list[int]) -> list[dict]:
+    """Reads the records starting at the given offsets of a segment."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    records = []
+    with opener(path, 'rb') as f:
+        for offset in sorted(offsets):
+            f.seek(offset)
+            (length,) = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            records.append(json.loads(f.read(length)))
+    return records
+
+
+def segment_owner(path: Path) -> str:
+    """Owner id from segment-{ns}-{owner}.log[.gz]; segments from before owners were recorded are "legacy"."""
+    parts = path.name.split(".")[0].split("-", 2)
+    return parts[2] if len(parts) == 3 else "legacy"
+
+
+def _index_rows(name: str, index: dict) -> Iterator[tuple[str, str, str, int]]:
+    for key, values in index.items():
+        for value, offsets in values.items():
+            for offset in offsets:
+                yield key, value, name, offset
+
+
+def _empty_index() -> dict:
+    return {"request_id": {}, "transaction_id": {}}
+
+
+def _add_to_index(index: dict, record: dict, offset: int):
+    for key in ("request_id", "transaction_id"):
+        value = record.get(key)
+        if value is not None:
+            index[key].setdefault(str(value), []).append(offset)
+
+
+class AuditSink:
+    """Append-only prediction audit log.
+
+    /predict enqueues records without blocking. A background thread drains
+    the queue in batches and appends them to the open segment with one fsync
+    per batch, rotating segments by size or age. A separate compressor thread
+    adds each closed segment's request_id/transaction_id offsets to a shared
+    sqlite index (index.sqlite) and gzips the segment, so neither holds up
+    draining. Segments closed more than retention_seconds ago are deleted
+    together with their index rows.
+
+    Writer failures (e.g. a full disk) are logged and retried; once stop() has
+    been called the writer gives up after stop_retries failed attempts and
+    counts whatever it could not write as dropped, so shutdown never hangs on
+    a broken disk. Several
+    processes (uvicorn workers) can share the directory: segment names carry
+    the writing process's owner id, and each process holds an flock on
+    writer-{owner}.lock while it runs. Segments whose owner no longer holds
+    its lock were left by a crash; the compressor of a running sink claims
+    that lock, indexes and compresses them.
+    """
+
+    def __init__(
+        self,
+        directory: str = "audit_logs",
+        max_queue_size: int = 10000,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        max_segment_seconds: float = 3600.0,
+        retry_interval: float = 1.0,
+        stop_retries: int = 3,
+        retention_seconds: Optional[float] = None,
+        retention_interval: float = 3600.0,
+    ):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.retry_interval = retry_interval
+        self.stop_retries = stop_retries
+        self.retention_seconds = retention_seconds
+        self.retention_interval = retention_interval
+        self.index_path = self.directory / "index.sqlite"
+        self._connections = threading.local()
+
+        self.owner = f"{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self._owner_lock = None
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._compress_queue = queue.Queue()
+        self._thread = None
+        self._compressor = None
+        self._stop = threading.Event()
+        self._index_lock = threading.Lock()
+
+        # State of the open segment, only touched by the writer thread
+        self._segment_file = None
+        self._segment_path = None
+        self._segment_bytes = 0
+        self._segment_opened_at = 0.0
+        self._segment_index = _empty_index()
+        # Closed segments the compressor has not added to the sqlite index yet, by name
+        self._closed = {}
+
+    def enqueue(self, record: dict) -> bool:
+        """Queues a record for writing. Returns False (and counts a drop) if the queue is full."""
+        try:
+            self._queue.put_nowait((time.time(), record))
+        except queue.Full:
+            audit_records_dropped_total.inc()
+            return False
+        audit_queue_depth.set(self._queue.qsize())
+        return True
+
+    def start(self):
+        """Takes this process's owner lock and starts the writer and compressor threads.
+
+        The compressor first recovers segments left behind by crashed owners.
+        """
+        if self._thread is not None:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._owner_lock = self._claim(self.owner)
+        self._stop.clear()
+        self._compressor = threading.Thread(target=self._run_compressor, name="audit-compressor", daemon=True)
+        self._compressor.start()
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Drains pending records, closes the open segment and stops both threads."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._compress_queue.put(None)
+        self._compressor.join()
+        self._compressor = None
+        self._release(self.owner, self._owner_lock)
+        self._owner_lock = None
+
+    def _db(self) -> sqlite3.Connection:
+        """Connection to the shared index for the calling thread, creating the index if needed."""
+        db = getattr(self._connections, "db", None)
+        if db is not None:
+            return db
+        self.directory.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.index_path, timeout=30.0)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        with db:
+            db.execute("CREATE TABLE IF NOT EXISTS segments (name TEXT PRIMARY KEY, closed_at REAL NOT NULL)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS records "
+                "(key_type TEXT NOT NULL, key TEXT NOT NULL, segment TEXT NOT NULL, offset INTEGER NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS records_by_key ON records (key_type, key)")
+            db.execute("CREATE INDEX IF NOT EXISTS records_by_segment ON records (segment)")
+        self._connections.db = db
+        return db
+
+    def _is_indexed(self, name: str) -> bool:
+        row = self._db().execute("SELECT 1 FROM segments WHERE name = ?", (name,)).fetchone()
+        return row is not None
+
+    def _publish_index(self, name: str, index: dict, closed_at: float):
+        """Adds a closed segment's offsets to the shared index; publishing a segment twice is a no-op."""
+        db = self._db()
+        with db:
+            cursor = db.execute("INSERT OR IGNORE INTO segments (name, closed_at) VALUES (?, ?)", (name, closed_at))
+            if cursor.rowcount:
+                db.executemany(
+                    "INSERT INTO records (key_type, key, segment, offset) VALUES (?, ?, ?, ?)",
+                    _index_rows(name, index),
+                )
+
+    def apply_retention(self, now: Optional[float] = None) -> int:
+        """Deletes segments closed more than retention_seconds ago. Returns how many were deleted."""
+        if self.retention_seconds is None:
+            return 0
+        cutoff = (time.time() if now is None else now) - self.retention_seconds
+        db = self._db()
+        names = [row[0] for row in db.execute("SELECT name FROM segments WHERE closed_at < ?", (cutoff,))]
+        for name in names:
+            # Files first: rows left by a crash here point at missing files and are swept next time
+            for suffix in (".log.gz", ".log"):
+                (self.directory / f"{name}{suffix}").unlink(missing_ok=True)
+            with db:
+                db.execute("DELETE FROM records WHERE segment = ?", (name,))
+                db.execute("DELETE FROM segments WHERE name = ?", (name,))
+        if names:
+            logger.info(f"Deleted {len(names)} audit segments past retention")
+        return len(names)
+
+    def _lock_path(self, owner: str) -> Path:
+        return self.directory / f"writer-{owner}.lock"
+
+    def _claim(self, owner: str):
+        """Takes the owner's lock without blocking. Returns the locked file, or None if the owner is alive."""
+        lock_file = open(self._lock_path(owner), 'a')
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        return lock_file
+
+    def _release(self, owner: str, lock_file):
+        try:
+            self._lock_path(owner).unlink()
+        except FileNotFoundError:
+            pass
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        lock_file.close()
+
+    def recover(self):
+        """Indexes and compresses segments of owners that are no longer running.
+
+        A crash leaves the open segment behind as a raw .log that is not in
+        the index; a crash during compression can leave a finished or partial
+        .gz next to it. Per-segment .idx files written before the sqlite index
+        existed are imported and removed. Segments of live owners, including
+        this one, are left alone.
+        """
+        by_owner = {}
+        for path in self.directory.glob("segment-*"):
+            owner = segment_owner(path)
+            if owner != self.owner and path.name.endswith((".idx", ".log", ".log.gz.tmp")):
+                by_owner.setdefault(owner, []).append(path)
+
+        for owner, paths in by_owner.items():
+            lock_file = self._claim(owner)
+            if lock_file is None:
+                continue
+            try:
+                # .idx sorts before .log, so imported indexes are in place before their segment is looked at
+                for path in sorted(paths):
+                    if path.name.endswith(".tmp"):
+                        path.unlink(missing_ok=True)
+                    elif path.suffix == ".idx":
+                        self._import_index_file(path)
+                    elif path.exists():
+                        self._recover_segment(path)
+            finally:
+                self._release(owner, lock_file)
+
+    def _import_index_file(self, index_path: Path):
+        with open(index_path, 'r') as f:
+            index = json.load(f)
+        self._publish_index(index_path.stem, index, index_path.stat().st_mtime)
+        index_path.unlink()
+
+    def _recover_segment(self, log_path: Path):
+        gz_path = log_path.with_suffix(".log.gz")
+        if not self._is_indexed(log_path.stem):
+            index = _empty_index()
+            for offset, record in read_segment(log_path):
+                _add_to_index(index, record, offset)
+            self._publish_index(log_path.stem, index, log_path.stat().st_mtime)
+            logger.warning(f"Recovered audit segment {log_path.name} left open by a stopped writer")
+
+        if gz_path.exists():
+            # Compressed before the crash, only the raw file was left behind
+            log_path.unlink()
+        else:
+            self._compress(log_path)
+
+    def _run(self):
+        batch = None
+        failures_after_stop = 0
+        while not self._stop.is_set() or not self._queue.empty() or batch:
+            try:
+                if not batch:
+                    batch = self._drain()
+                if batch:
+                    self._write_batch(batch)
+                    batch = None
+                if self._segment_file is not None and self._segment_expired():
+                    self._close_segment()
+            except Exception:
+                # Keep the batch and retry; meanwhile enqueue drops once the queue is full
+                logger.exception(f"Audit writer failed, retrying in {self.retry_interval}s")
+                audit_write_errors_total.inc()
+                self._discard_partial_write()
+                if self._stop.is_set():
+                    failures_after_stop += 1
+                    if failures_after_stop >= self.stop_retries:
+                        self._abandon(batch or [])
+                        batch = None
+                        break
+                time.sleep(self.retry_interval)
+
+        if self._segment_file is not None:
+            try:
+                self._close_segment()
+            except Exception:
+                logger.exception("Audit writer failed to close the last segment, it is recovered on next start")
+                audit_write_errors_total.inc()
+
+    def _abandon(self, batch: list):
+        """Drops the failed batch and everything still queued when stopping with a writer that keeps failing."""
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return
+        audit_records_dropped_total.inc(len(batch))
+        audit_queue_depth.set(0)
+        request_ids = [record.get("request_id") for _, record in batch]
+        logger.error(f"Audit writer stopped after {self.stop_retries} failed attempts, dropped {len(batch)} records: {request_ids}")
+
+    def _discard_partial_write(self):
+        """Cuts the open segment back to its last durable offset so a retried batch lines up with the index."""
+        if self._segment_file is None or self._segment_file.closed:
+            return
+        try:
+            self._segment_file.truncate(self._segment_bytes)
+            self._segment_file.seek(self._segment_bytes)
+        except OSError:
+            # Leave it to recover() on the next start and continue in a fresh segment
+            logger.exception(f"Could not truncate audit segment {self._segment_path.name}, starting a new one")
+            try:
+                self._segment_file.close()
+            except OSError:
+                pass
+            with self._index_lock:
+                self._segment_file = None
+                self._segment_path = None
+                self._segment_index = _empty_index()
+
+    def _run_compressor(self):
+        try:
+            self.recover()
+        except Exception:
+            logger.exception("Failed to recover audit segments of stopped writers")
+            audit_write_errors_total.inc()
+
+        next_sweep = 0.0
+        while True:
+            if time.monotonic() >= next_sweep:
+                try:
+                    self.apply_retention()
+                except Exception:
+                    logger.exception("Failed to delete audit segments past retention")
+                    audit_write_errors_total.inc()
+                next_sweep = time.monotonic() + self.retention_interval
+
+            try:
+                item = self._compress_queue.get(timeout=max(0.0, next_sweep - time.monotonic()))
+            except queue.Empty:
+                continue
+            if item is None:
+                return
+            log_path, index, closed_at = item
+            try:
+                self._publish_index(log_path.stem, index, closed_at)
+                with self._index_lock:
+                    del self._closed[log_path.stem]
+                self._compress(log_path)
+            except Exception:
+                # Lookups keep finding the segment in _closed or the index; the rest is retried on next start
+                logger.exception(f"Failed to index or compress audit segment {log_path.name}")
+                audit_write_errors_total.inc()
+
+    @staticmethod
+    def _compress(log_path: Path):
+        gz_path = log_path.with_suffix(".log.gz")
+        tmp_path = gz_path.with_name(gz_path.name + ".tmp")
+        with open(log_path, 'rb') as src, gzip.open(tmp_path, 'wb') as dst:
+            while chunk := src.read(1024 * 1024):
+                dst.write(chunk)
+        # Publish the .gz atomically before dropping the raw file lookups may be reading
+        os.replace(tmp_path, gz_path)
+        log_path.unlink()
+
+    def _drain(self) -> list:
+        """Waits up to flush_interval for a record, then takes whatever else is queued."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _segment_expired(self) -> bool:
+        return (
+            self._segment_bytes >= self.max_segment_bytes
+            or time.time() - self._segment_opened_at >= self.max_segment_seconds
+        )
+
+    def _open_segment(self):
+        name = f"segment-{time.time_ns():020d}-{self.owner}.log"
+        segment_path = self.directory / name
+        segment_file = open(segment_path, 'ab')
+        with self._index_lock:
+            self._segment_path = segment_path
+            self._segment_file = segment_file
+            self._segment_index = _empty_index()
+        self._segment_bytes = 0
+        self._segment_opened_at = time.time()
+
+    def _close_segment(self):
+        if not self._segment_file.closed:
+            self._segment_file.flush()
+            os.fsync(self._segment_file.fileno())
+            self._segment_file.close()
+
+        # Lookups find the segment in _closed until the compressor has added it to the index
+        with self._index_lock:
+            self._closed[self._segment_path.stem] = (self._segment_path, self._segment_index)
+            self._compress_queue.put((self._segment_path, self._segment_index, time.time()))
+            self._segment_file = None
+            self._segment_path = None
+            self._segment_index = _empty_index()
+
+    def _write_batch(self, batch: list):
+        if self._segment_file is None:
+            self._open_segment()
+
+        chunks = []
+        entries = []
+        offset = self._segment_bytes
+        for _, record in batch:
+            data = encode_record(record)
+            chunks.append(data)
+            entries.append((record, offset))
+            offset += len(data)
+
+        # One write and one fsync for the whole batch
+        self._segment_file.write(b"".join(chunks))
+        self._segment_file.flush()
+        os.fsync(self._segment_file.fileno())
+        self._segment_bytes = offset
+
+        # Only index records once they are durable
+        with self._index_lock:
+            for record, record_offset in entries:
+                _add_to_index(self._segment_index, record, record_offset)
+
+        audit_records_written_total.inc(len(batch))
+        audit_queue_depth.set(self._queue.qsize())
+        audit_lag_seconds.set(time.time() - batch[0][0])
+
+    def lookup(self, request_id: Optional[str] = None, transaction_id: Optional[str] = None) -> list[dict]:
+        """Finds audit records by request_id or transaction_id across all segments."""
+        if request_id is not None:
+            key, value = "request_id", request_id
+        elif transaction_id is not None:
+            key, value = "transaction_id", transaction_id
+        else:
+            raise ValueError("request_id or transaction_id is required")
+
+        matches = {}
+        with self._index_lock:
+            in_memory = list(self._closed.values())
+            if self._segment_path is not None:
+                in_memory.append((self._segment_path, self._segment_index))
+            for path, index in in_memory:
+                matches[path.stem] = list(index[key].get(value, []))
+        # Segments still held in memory were snapshotted above
+        held = set(matches)
+
+        rows = self._db().execute(
+            "SELECT segment, offset FROM records WHERE key_type = ? AND key = ?", (key, value)
+        )
+        for segment, offset in rows:
+            if segment not in held:
+                matches.setdefault(segment, []).append(offset)
+
+        records = []
+        for segment in sorted(matches):
+            offsets = matches[segment]
+            if not offsets:
+                continue
+            path = self.directory / f"{segment}.log"
+            try:
+                records.extend(read_records_at(path, offsets))
+            except FileNotFoundError:
+                # The segment was compressed since it was indexed
+                try:
+                    records.extend(read_records_at(path.with_suffix(".log.gz"), offsets))
+                except FileNotFoundError:
+                    # Deleted by retention in the meantime
+                    continue
+        return records
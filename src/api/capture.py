@@ -0,0 +1,132 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+
+class TrafficCapture:
+    """Samples /predict traffic into a JSON lines file for replay.
+
+    Each line holds the capture session (one per process, so restarts and
+    workers sharing CAPTURE_PATH stay distinguishable), the wall-clock arrival
+    time, the arrival offset within the session, the sample rate, the original
+    request payload with the headers that route it to a lane (X-Priority,
+    X-API-Key), and the response that was served. Overhead is bounded by
+    the sample rate and by max_records, after which capture stops.
+    """
+
+    def __init__(self, path: Optional[str] = None, sample_rate: float = 0.0, max_records: int = 100000):
+        self.path = Path(path) if path else None
+        self.sample_rate = sample_rate
+        self.max_records = max_records
+        self.captured = 0
+        self.session = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # Offsets come from the monotonic clock; the epoch anchors them to wall-clock time
+        self._started_at = time.monotonic()
+        self._started_epoch = time.time()
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None and self.sample_rate > 0 and self.captured < self.max_records
+
+    def sample(self) -> Optional[float]:
+        """Decides whether to capture the current request.
+
+        Returns the arrival offset if the request is sampled, otherwise None.
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        return time.monotonic() - self._started_at
+
+    def record(
+        self,
+        arrival: float,
+        request: dict,
+        status_code: int,
+        response: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ):
+        """Appends a sampled request, its routing headers and its response to the capture file."""
+        line = json.dumps(
+            {
+                "session": self.session,
+                "ts": self._started_epoch + arrival,
+                "t": arrival,
+                "sample_rate": self.sample_rate,
+                "request": request,
+                "headers": headers or {},
+                "status_code": status_code,
+                "response": response,
+            },
+            separators=(",", ":"),
+            default=str,
+        )
+        with self._lock:
+            if self.captured >= self.max_records:
+                return
+            if self._file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a', encoding="utf-8")
+            self._file.write(line + "\n")
+            self.captured += 1
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def load_capture(path: str, session: Optional[str] = None) -> list[dict]:
+    """Reads captured records ordered by wall-clock arrival, optionally from a single session.
+
+    Files written before sessions were recorded are read as one session timed by t.
+    """
+    with open(path, 'r', encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    for record in records:
+        record.setdefault("session", "")
+        record.setdefault("ts", record["t"])
+    if session is not None:
+        records = [r for r in records if r["session"] == session]
+    return sorted(records, key=lambda r: r["ts"])
+
+
+def arrival_offsets(records: list[dict]) -> list[float]:
+    """Replay offsets (seconds from the first arrival) for records sorted by ts.
+
+    Sessions that overlap in wall-clock time (several workers) interleave as
+    they did in production. Time during which no session was capturing (a
+    restart or a later capture run) is cut out, so it is not replayed as idle.
+    """
+    times = [record.get("ts", record["t"]) for record in records]
+    spans = {}
+    for record, ts in zip(records, times):
+        session = record.get("session", "")
+        start, end = spans.get(session, (ts, ts))
+        spans[session] = (min(start, ts), max(end, ts))
+
+    # Gaps between the merged session spans are the dead time to remove
+    gaps = []
+    covered_until = None
+    for start, end in sorted(spans.values()):
+        if covered_until is not None and start > covered_until:
+            gaps.append((covered_until, start))
+        covered_until = end if covered_until is None else max(covered_until, end)
+
+    offsets = []
+    removed = 0.0
+    gap_index = 0
+    first = times[0] if times else 0.0
+    for ts in times:
+        while gap_index < len(gaps) and gaps[gap_index][1] <= ts:
+            removed += gaps[gap_index][1] - gaps[gap_index][0]
+            gap_index += 1
+        offsets.append(ts - first - removed)
+    return offsets
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse, Response
 from datetime import datetime, timezone
@@ -10,13 +10,27 @@ from src.api.metrics import (
     invalid_requests_total,
     inference_failures_total,
     latency_ms,
-    model_loaded
+    model_loaded,
+    fallback_predictions_total,
+    lane_latency_ms,
+    model_size_bytes,
+    feature_drift_psi,
+    feature_quantile
 )
+from src.api.monitoring import DriftMonitor
+from src.api.audit import AuditSink
+from src.api.capture import TrafficCapture
+from src.api.profiling import MemoryProfiler, install_gc_timing
+from src.api.scheduler import LaneScheduler, LaneFull, PriorityClassifier, load_priority_config
 from src.model.loader import ModelLoader
 from src.model.normalize import normalize_request
-from src.model.features import build_features
+from src.model.features import transaction_features, features_to_frame
+from src.model.pipeline import PipelineContexts
+from src.model.inference import BudgetedInference
+from src.model.explain import ExplanationCache, ExplanationUnavailable
 from src.model.decision import map_decision
 import logging
+import os
 import time
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
@@ -28,6 +42,52 @@ logging.basicConfig(level=logging.INFO)
 # Global model loader instance
 model_loader = ModelLoader()
 
+# Priority lanes feeding the inference workers with weighted fair dequeueing
+priority_config = load_priority_config()
+lane_scheduler = LaneScheduler(
+    lanes=priority_config["lanes"],
+    workers=int(os.environ.get("INFERENCE_WORKERS", "8"))
+)
+priority_classifier = PriorityClassifier(
+    lanes=list(priority_config["lanes"]),
+    default_lane=priority_config.get("default_lane", "standard"),
+    high_value_lane=priority_config.get("high_value_lane", "realtime"),
+    high_value_amount=priority_config.get("high_value_amount"),
+    api_keys=priority_config.get("api_keys")
+)
+
+# Model stage latency budget; late answers are replaced by the fallback scorer
+budgeted_inference = BudgetedInference(
+    budget_ms=float(os.environ.get("INFERENCE_BUDGET_MS", "50")),
+    scheduler=lane_scheduler
+)
+
+# Explanations are only computed on request and cached per model_version + features
+explanation_cache = ExplanationCache()
+
+# PIPELINE_MODE=reuse normalizes into per-thread records and reused model input columns
+pipeline_mode = os.environ.get("PIPELINE_MODE", "standard")
+pipeline_contexts = PipelineContexts()
+
+# Opt-in allocation profiling (MEMORY_PROFILING=1); GC pause timing is always on
+memory_profiler = MemoryProfiler(enabled=os.environ.get("MEMORY_PROFILING") == "1")
+install_gc_timing()
+
+# Online drift monitor fed from /predict
+drift_monitor = DriftMonitor()
+
+# Append-only audit log of every decision, written in the background
+audit_sink = AuditSink(
+    directory=os.environ.get("AUDIT_LOG_DIR", "audit_logs"),
+    retention_seconds=float(os.environ.get("AUDIT_RETENTION_DAYS", "400")) * 86400
+)
+
+# Sampled traffic capture for replay, off unless CAPTURE_PATH is set
+traffic_capture = TrafficCapture(
+    path=os.environ.get("CAPTURE_PATH"),
+    sample_rate=float(os.environ.get("CAPTURE_SAMPLE_RATE", "0.01"))
+)
+
 @app.on_event("startup")
 async def startup_event():
     """Event handler for application startup to load the active model."""
@@ -38,15 +98,116 @@ async def startup_event():
         model_loader.load_active_model()
         logger.info(f"Model loaded successfully at startup: {model_loader.metadata.get('model_version', 'unknown')}")
         model_loaded.set(1)
+        model_size_bytes.set(model_loader.model_size_bytes)
+        drift_monitor.load_baseline(model_loader.model_dir)
     except Exception as e:
         logger.error(f"Failed to load model at startup: {str(e)}")
         model_loaded.set(0)
 
+    audit_sink.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Event handler for application shutdown to flush the audit log."""
+    audit_sink.stop()
+    traffic_capture.close()
+    budgeted_inference.shutdown()
+
 @app.get("/metrics")
 async def metrics():
     """Prometheus metrics endpoint."""
+    refresh_monitoring_metrics()
     return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
+def refresh_monitoring_metrics():
+    """Copies the drift monitor state into the Prometheus gauges.
+
+    Both gauges are cleared first so features no longer reported (empty
+    window, rotated window, new baseline) do not keep exporting stale values.
+    """
+    feature_drift_psi.clear()
+    feature_quantile.clear()
+    for feature, value in drift_monitor.drift().items():
+        feature_drift_psi.labels(feature=feature).set(value)
+
+    snapshot = drift_monitor.snapshot()
+    for feature, summary in snapshot["current"]["numeric"].items():
+        for quantile in ("p50", "p90", "p99"):
+            if summary[quantile] is not None:
+                feature_quantile.labels(feature=feature, quantile=quantile).set(summary[quantile])
+
+@app.get("/monitoring")
+def monitoring():
+    """Windowed feature/score distributions and drift against the model baseline."""
+    return drift_monitor.snapshot()
+
+@app.post("/monitoring/baseline")
+def save_monitoring_baseline():
+    """Writes the last completed monitoring window as the active model's baseline.json."""
+    if not model_loader.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    if drift_monitor.export_baseline()["count"] == 0:
+        raise HTTPException(status_code=409, detail="No traffic observed yet, nothing to use as a baseline")
+
+    baseline = drift_monitor.save_baseline(model_loader.model_dir)
+    logger.info(f"Wrote drift baseline of {baseline['count']} predictions to {model_loader.model_dir / 'baseline.json'}")
+    return {"model_version": model_loader.metadata.get("model_version", "unknown"), "count": baseline["count"]}
+
+@app.get("/audit")
+def audit_lookup(request_id: str | None = None, transaction_id: str | None = None):
+    """Looks up audit records by request_id or transaction_id."""
+    if request_id is None and transaction_id is None:
+        raise HTTPException(status_code=400, detail="request_id or transaction_id is required")
+    return {"records": audit_sink.lookup(request_id=request_id, transaction_id=transaction_id)}
+
+@app.get("/explain/{request_id}")
+def explain_request(request_id: str):
+    """Explains a past prediction, using the features recorded in the audit log."""
+    if not model_loader.is_loaded:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+
+    records = audit_sink.lookup(request_id=request_id)
+    if not records:
+        raise HTTPException(status_code=404, detail=f"No audit record for request_id={request_id}")
+
+    record = records[-1]
+    model_version = model_loader.metadata.get("model_version", "unknown")
+    if record["model_version"] != model_version:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Prediction was made by model {record['model_version']}, active model is {model_version}"
+        )
+
+    try:
+        explanation = explanation_cache.get_or_compute(
+            model_loader.model, model_version, record["features"], features_to_frame(record["features"])
+        )
+    except ExplanationUnavailable as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    return {"request_id": request_id, "model_version": model_version, "explanation": explanation}
+
+@app.get("/debug/memory")
+def debug_memory(limit: int = 20):
+    """tracemalloc snapshot grouped by pipeline stage. Becomes the base for /debug/memory/diff."""
+    if not memory_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Memory profiling is disabled (set MEMORY_PROFILING=1)")
+    return memory_profiler.snapshot(limit=limit)
+
+@app.get("/debug/memory/diff")
+def debug_memory_diff(limit: int = 20):
+    """Allocation growth by pipeline stage since the previous snapshot."""
+    if not memory_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Memory profiling is disabled (set MEMORY_PROFILING=1)")
+    return memory_profiler.diff(limit=limit)
+
+@app.post("/debug/memory/stages")
+def debug_memory_stages(requests: int = 100):
+    """Measures per-stage allocations of the next N /predict requests, serializing them while it lasts."""
+    if not memory_profiler.enabled:
+        raise HTTPException(status_code=404, detail="Memory profiling is disabled (set MEMORY_PROFILING=1)")
+    return {"profiling_requests": memory_profiler.profile_stages(requests)}
+
 @app.get("/health")
 def health():
     """Health check endpoint."""
@@ -74,11 +235,25 @@ def get_model_info():
               "description": "Validation error (bad request)"}
               }
             )
-def predict(req: PredictRequest):
+def predict(
+    req: PredictRequest,
+    explain: bool = False,
+    x_priority: str | None = Header(default=None),
+    x_api_key: str | None = Header(default=None)
+):
     start_time = time.time()
+    arrival = traffic_capture.sample()
+    captured_request = req.model_dump(mode="json") if arrival is not None else None
+    # Lane routing depends on these, so replay has to send them again
+    captured_headers = {
+        name: value for name, value in (("X-Priority", x_priority), ("X-API-Key", x_api_key)) if value is not None
+    }
     
     # Count request
     requests_total.labels(endpoint="/predict", method="POST").inc()
+
+    # No-op unless a /debug/memory/stages window is open
+    stages = memory_profiler.begin()
     
     try:
         if not model_loader.is_loaded:
@@ -87,30 +262,85 @@ def predict(req: PredictRequest):
             responses_total.labels(endpoint="/predict", status_code="503").inc()
             raise HTTPException(status_code=503, detail="Model not loaded")
 
-        req = normalize_request(req)
-        features_df = build_features(req)
+        if pipeline_mode == "reuse":
+            context = pipeline_contexts.get()
+            txn = context.normalize(req)
+            stages.mark("normalize")
+            features = context.features
+            features_df = context.build_frame()
+        else:
+            req = normalize_request(req)
+            txn = req.transaction
+            stages.mark("normalize")
+            features = transaction_features(txn)
+            features_df = features_to_frame(features)
+        stages.mark("features")
+        lane = priority_classifier.classify(txn.amount, priority=x_priority, api_key=x_api_key)
+        budget_ms = lane_scheduler.lanes[lane].budget_ms
+        if budget_ms is None:
+            budget_ms = budgeted_inference.budget_ms
 
         try:
-            risk_proba = model_loader.model.predict_proba(features_df)
-            risk_score = float(risk_proba[0][1])
+            risk_score, used_fallback = budgeted_inference.score(
+                model_loader.model,
+                features_df,
+                features,
+                fallback=model_loader.fallback,
+                lane=lane,
+                budget_ms=budget_ms
+            )
 
             if not (0.0 <= risk_score <= 1.0):
                 raise ValueError(f"Predicted risk score is out of range: {risk_score}")
+
+        except LaneFull as e:
+            logger.warning(
+                f"Rejected request_id={req.request_id}: {str(e)}",
+                extra={
+                    "request_id": req.request_id,
+                    "transaction_id": txn.transaction_id,
+                    "lane": lane,
+                    "error_type": "LaneFull"
+                }
+            )
+            responses_total.labels(endpoint="/predict", status_code="503").inc()
+            if arrival is not None:
+                traffic_capture.record(arrival, captured_request, 503, headers=captured_headers)
+            raise HTTPException(status_code=503, detail=f"Service saturated: {str(e)}")
             
         except Exception as e:
             logger.error(
                 f"Inference error for request_id={req.request_id}: {str(e)}",
                 extra={
                     "request_id": req.request_id,
-                    "transaction_id": req.transaction.transaction_id,
+                    "transaction_id": txn.transaction_id,
                     "error_type": type(e).__name__
                 }
             )
             inference_failures_total.inc()
             responses_total.labels(endpoint="/predict", status_code="503").inc()
+            if arrival is not None:
+                traffic_capture.record(arrival, captured_request, 503, headers=captured_headers)
             raise HTTPException(status_code=503, detail=f"Inference failed: {str(e)}")
         
+        stages.mark("inference")
+
+        if used_fallback:
+            logger.warning(
+                f"Model exceeded {budget_ms} ms budget of lane {lane}, used fallback for request_id={req.request_id}",
+                extra={
+                    "request_id": req.request_id,
+                    "transaction_id": txn.transaction_id,
+                    "lane": lane,
+                    "error_type": "InferenceTimeout"
+                }
+            )
+            fallback_predictions_total.labels(reason="timeout").inc()
+
         decision = map_decision(risk_score)
+
+        drift_monitor.observe(features, risk_score, decision)
+        stages.mark("decision")
         
         # Calculate latency
         latency = (time.time() - start_time) * 1000  # Convert to ms
@@ -120,25 +350,63 @@ def predict(req: PredictRequest):
             f"Prediction successful",
             extra={
                 "request_id": req.request_id,
-                "transaction_id": req.transaction.transaction_id,
+                "transaction_id": txn.transaction_id,
                 "model_version": model_loader.metadata.get("model_version"),
                 "decision": decision,
                 "risk_score": risk_score,
+                "fallback_used": used_fallback,
+                "lane": lane,
                 "latency_ms": round(latency, 2)
             }
         )
         
         # Record metrics
         latency_ms.labels(endpoint="/predict").observe(latency)
+        lane_latency_ms.labels(lane=lane).observe(latency)
         responses_total.labels(endpoint="/predict", status_code="200").inc()
         
-        return PredictResponse(
+        # Only requests that ask for an explanation pay for it
+        explanation = None
+        if explain and not used_fallback:
+            try:
+                explanation = explanation_cache.get_or_compute(
+                    model_loader.model, model_loader.metadata.get("model_version", "unknown"), features, features_df
+                )
+            except ExplanationUnavailable as e:
+                logger.warning(f"Explanation unavailable for request_id={req.request_id}: {str(e)}")
+
+        response = PredictResponse(
             request_id=req.request_id,
             decision=decision,
             risk_score=risk_score,
             model_version=model_loader.metadata.get("model_version", "unknown"),
-            processed_at=datetime.now(timezone.utc)
+            processed_at=datetime.now(timezone.utc),
+            fallback_used=used_fallback,
+            explanation=explanation
         )
+
+        # Never blocks; drops are counted in audit_records_dropped_total
+        audit_sink.enqueue({
+            "request_id": req.request_id,
+            "transaction_id": txn.transaction_id,
+            "event_time": req.event_time.isoformat(),
+            # The record outlives the request, so it takes its own copy of reused state
+            "transaction": txn.model_dump(),
+            "features": dict(features),
+            "model_version": response.model_version,
+            "risk_score": risk_score,
+            "decision": decision,
+            "fallback_used": used_fallback,
+            "processed_at": response.processed_at.isoformat(),
+        })
+
+        if arrival is not None:
+            traffic_capture.record(
+                arrival, captured_request, 200, response.model_dump(mode="json"), headers=captured_headers
+            )
+        stages.mark("respond")
+
+        return response
     
     except HTTPException:
         # Re-raise HTTP exceptions (already logged above)
@@ -151,6 +419,8 @@ def predict(req: PredictRequest):
         )
         responses_total.labels(endpoint="/predict", status_code="500").inc()
         raise HTTPException(status_code=500, detail="Internal server error")
+    finally:
+        stages.end()
     
 
 @app.exception_handler(RequestValidationError)
@@ -32,4 +32,119 @@ latency_ms = Histogram(
 model_loaded = Gauge(
     'model_loaded',
     'Indicates if the model is loaded (1 for loaded, 0 for not loaded)'
-)
\ No newline at end of file
+)
+
+feature_drift_psi = Gauge(
+    'feature_drift_psi',
+    'Population stability index of a feature against the model baseline',
+    ['feature']
+)
+
+feature_quantile = Gauge(
+    'feature_quantile',
+    'Approximate quantile of a numeric feature over the current monitoring window',
+    ['feature', 'quantile']
+)
+
+audit_records_written_total = Counter(
+    'audit_records_written_total',
+    'Total number of prediction audit records written to disk'
+)
+
+audit_records_dropped_total = Counter(
+    'audit_records_dropped_total',
+    'Total number of prediction audit records dropped because the queue was full'
+)
+
+audit_queue_depth = Gauge(
+    'audit_queue_depth',
+    'Number of audit records waiting to be written'
+)
+
+audit_lag_seconds = Gauge(
+    'audit_lag_seconds',
+    'Age of the oldest record in the last audit batch when it was written'
+)
+
+audit_write_errors_total = Counter(
+    'audit_write_errors_total',
+    'Total number of audit writer or compressor failures (the writer retries)'
+)
+
+fallback_predictions_total = Counter(
+    'fallback_predictions_total',
+    'Total number of predictions answered by the fallback scorer',
+    ['reason']
+)
+
+lane_queue_depth = Gauge(
+    'lane_queue_depth',
+    'Number of requests waiting for an inference worker, per priority lane',
+    ['lane']
+)
+
+lane_queue_wait_ms = Histogram(
+    'lane_queue_wait_ms',
+    'Time requests spend queued before an inference worker picks them up, in milliseconds',
+    ['lane']
+)
+
+lane_latency_ms = Histogram(
+    'lane_latency_ms',
+    'Latency of /predict requests in milliseconds, per priority lane',
+    ['lane']
+)
+
+lane_rejected_total = Counter(
+    'lane_rejected_total',
+    'Total number of requests rejected because their lane queue was full',
+    ['lane']
+)
+
+consumer_records_total = Counter(
+    'consumer_records_total',
+    'Total number of stream records processed by the consumer',
+    ['status']
+)
+
+consumer_lag = Gauge(
+    'consumer_lag',
+    'Number of stream records not yet committed by the consumer'
+)
+
+consumer_batch_size = Histogram(
+    'consumer_batch_size',
+    'Number of records per consumer micro-batch',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+)
+
+consumer_batch_latency_ms = Histogram(
+    'consumer_batch_latency_ms',
+    'Time to validate, score and publish one consumer micro-batch in milliseconds'
+)
+
+gc_pause_ms = Histogram(
+    'gc_pause_ms',
+    'Duration of garbage collection pauses in milliseconds',
+    ['generation'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250)
+)
+
+stage_allocated_bytes = Histogram(
+    'stage_allocated_bytes',
+    'Bytes allocated (tracemalloc peak growth) per /predict pipeline stage, when profiling is enabled',
+    ['stage'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+
+stage_net_blocks = Histogram(
+    'stage_net_blocks',
+    'Net change in allocated memory blocks per /predict pipeline stage, when profiling is enabled',
+    ['stage'],
+    buckets=(-100, -10, 0, 10, 50, 100, 500, 1000, 5000)
+)
+
+model_size_bytes = Gauge(
+    'model_size_bytes',
+    'Memory occupied by the loaded model in bytes (allocation growth while unpickling it)'
+)
@@ -0,0 +1,295 @@
+import bisect
+import hashlib
+import json
+import math
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Optional
+
+# Fixed bin edges used for numeric features. Using fixed bins (instead of a
+# mergeable t-digest/KLL) keeps every update O(1) and the memory footprint
+# constant, and makes PSI against a stored baseline a direct bin-by-bin compare.
+RISK_SCORE_EDGES = [i / 20 for i in range(21)]
+AMOUNT_EDGES = [0.0, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 200.0, 500.0,
+                1000.0, 2000.0, 5000.0, 10000.0, 50000.0, math.inf]
+
+NUMERIC_FEATURES = {
+    "risk_score": RISK_SCORE_EDGES,
+    "amount": AMOUNT_EDGES,
+}
+CATEGORICAL_FEATURES = ["decision", "currency", "country", "merchant_category", "device_type"]
+
+OTHER_BUCKET = "__other__"
+PSI_EPSILON = 1e-4
+
+
+class BinnedQuantileSketch:
+    """Constant-memory histogram over fixed bin edges with approximate quantiles."""
+
+    def __init__(self, edges: list[float]):
+        self.edges = edges
+        self.counts = [0] * (len(edges) - 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        """Adds a value to the sketch. Values outside the edges land in the end bins."""
+        idx = bisect.bisect_right(self.edges, value) - 1
+        idx = min(max(idx, 0), len(self.counts) - 1)
+        self.counts[idx] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimates the q-th quantile by linear interpolation inside the matching bin."""
+        if self.count == 0:
+            return None
+
+        target = q * self.count
+        seen = 0
+        for idx, bin_count in enumerate(self.counts):
+            if bin_count == 0:
+                continue
+            if seen + bin_count >= target:
+                lower = max(self.edges[idx], self.min)
+                upper = min(self.edges[idx + 1], self.max)
+                fraction = (target - seen) / bin_count
+                return lower + (upper - lower) * fraction
+            seen += bin_count
+        return self.max
+
+    def proportions(self) -> list[float]:
+        if self.count == 0:
+            return [0.0] * len(self.counts)
+        return [c / self.count for c in self.counts]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+        }
+
+
+class CountMinSketch:
+    """Count-min sketch giving over-estimated frequencies in fixed memory."""
+
+    def __init__(self, width: int = 256, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, value: str):
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8 * self.depth).digest()
+        for row in range(self.depth):
+            chunk = digest[row * 8:(row + 1) * 8]
+            yield row, int.from_bytes(chunk, "little") % self.width
+
+    def add(self, value: str) -> int:
+        """Increments the value and returns its new estimated count."""
+        estimate = None
+        for row, col in self._indexes(value):
+            self.table[row][col] += 1
+            cell = self.table[row][col]
+            estimate = cell if estimate is None else min(estimate, cell)
+        return estimate
+
+    def estimate(self, value: str) -> int:
+        return min(self.table[row][col] for row, col in self._indexes(value))
+
+
+class HeavyHitterSketch:
+    """Tracks the top-k most frequent categorical values on top of a count-min sketch."""
+
+    def __init__(self, k: int = 20, width: int = 256, depth: int = 4):
+        self.k = k
+        self.cms = CountMinSketch(width=width, depth=depth)
+        self.top: dict[str, int] = {}
+        self.count = 0
+
+    def add(self, value: str):
+        self.count += 1
+        estimate = self.cms.add(value)
+
+        if value in self.top or len(self.top) < self.k:
+            self.top[value] = estimate
+            return
+
+        # k is small and fixed, so the min scan is bounded
+        smallest = min(self.top, key=self.top.get)
+        if estimate > self.top[smallest]:
+            del self.top[smallest]
+            self.top[value] = estimate
+
+    def proportions(self) -> dict[str, float]:
+        """Returns value proportions for the heavy hitters plus an other bucket."""
+        if self.count == 0:
+            return {}
+        result = {value: min(c, self.count) / self.count for value, c in self.top.items()}
+        result[OTHER_BUCKET] = max(0.0, 1.0 - sum(result.values()))
+        return result
+
+    def summary(self) -> dict:
+        ranked = sorted(self.top.items(), key=lambda item: item[1], reverse=True)
+        return {"count": self.count, "top": dict(ranked)}
+
+
+def psi(expected: list[float], actual: list[float]) -> float:
+    """Population stability index between two aligned lists of proportions."""
+    total = 0.0
+    for e, a in zip(expected, actual):
+        e = max(e, PSI_EPSILON)
+        a = max(a, PSI_EPSILON)
+        total += (a - e) * math.log(a / e)
+    return total
+
+
+class WindowStats:
+    """Sketches for all monitored features over a single time window."""
+
+    def __init__(self, start: float):
+        self.start = start
+        self.numeric = {name: BinnedQuantileSketch(edges) for name, edges in NUMERIC_FEATURES.items()}
+        self.categorical = {name: HeavyHitterSketch() for name in CATEGORICAL_FEATURES}
+
+    @property
+    def count(self) -> int:
+        return self.numeric["risk_score"].count
+
+    def observe(self, features: Mapping, risk_score: float, decision: str):
+        for name, sketch in self.numeric.items():
+            value = risk_score if name == "risk_score" else features.get(name)
+            if value is not None:
+                sketch.add(float(value))
+        for name, sketch in self.categorical.items():
+            value = decision if name == "decision" else features.get(name)
+            if value is not None:
+                sketch.add(str(value))
+
+    def drift(self, baseline: Optional[dict]) -> dict:
+        """Computes PSI per feature against the baseline. Features without a baseline are skipped."""
+        if not baseline or self.count == 0:
+            return {}
+
+        result = {}
+        features = baseline.get("features", {})
+        for name, sketch in self.numeric.items():
+            spec = features.get(name, {})
+            expected = spec.get("proportions")
+            # Bin-by-bin PSI is only meaningful if the baseline used the same edges
+            if expected and spec.get("edges") == sketch.edges and len(expected) == len(sketch.counts):
+                result[name] = psi(expected, sketch.proportions())
+
+        for name, sketch in self.categorical.items():
+            expected = features.get(name, {}).get("proportions")
+            if not expected:
+                continue
+            actual = sketch.proportions()
+            keys = set(expected) | set(actual)
+            result[name] = psi(
+                [expected.get(key, 0.0) for key in keys],
+                [actual.get(key, 0.0) for key in keys],
+            )
+        return result
+
+    def to_baseline(self) -> dict:
+        """Serializes this window into the baseline.json format."""
+        features = {}
+        for name, sketch in self.numeric.items():
+            features[name] = {"edges": sketch.edges, "proportions": sketch.proportions()}
+        for name, sketch in self.categorical.items():
+            features[name] = {"proportions": sketch.proportions()}
+        return {"count": self.count, "features": features}
+
+    def summary(self) -> dict:
+        return {
+            "window_start": self.start,
+            "count": self.count,
+            "numeric": {name: s.summary() for name, s in self.numeric.items()},
+            "categorical": {name: s.summary() for name, s in self.categorical.items()},
+        }
+
+
+class DriftMonitor:
+    """Online score and input drift monitor fed from /predict.
+
+    Keeps a tumbling current window and the last completed window. Every
+    update is O(1) and memory is bounded regardless of traffic volume.
+    """
+
+    def __init__(self, window_seconds: float = 300.0, clock=time.time):
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self.baseline: Optional[dict] = None
+        self.current = WindowStats(self.clock())
+        self.previous: Optional[WindowStats] = None
+        self._lock = threading.Lock()
+
+    def load_baseline(self, model_dir: Path):
+        """Loads baseline.json from the model directory, if present."""
+        baseline_path = Path(model_dir) / "baseline.json"
+        if not baseline_path.exists():
+            self.baseline = None
+            return
+
+        with open(baseline_path, 'r') as f:
+            self.baseline = json.load(f)
+
+    def _rotate(self, now: float):
+        if now - self.current.start >= self.window_seconds:
+            self.previous = self.current
+            self.current = WindowStats(now)
+
+    def observe(self, features: Mapping, risk_score: float, decision: str):
+        """Records one scored transaction. Features are read in place, not copied."""
+        with self._lock:
+            self._rotate(self.clock())
+            self.current.observe(features, risk_score, decision)
+
+    def drift(self) -> dict:
+        """PSI per feature for the last completed window, falling back to the current one."""
+        with self._lock:
+            self._rotate(self.clock())
+            window = self.previous if self.previous is not None else self.current
+            return window.drift(self.baseline)
+
+    def export_baseline(self) -> dict:
+        """Returns the most recent completed window (or current) in baseline.json format."""
+        with self._lock:
+            window = self.previous if self.previous is not None else self.current
+            return window.to_baseline()
+
+    def save_baseline(self, model_dir: Path) -> dict:
+        """Writes export_baseline() to baseline.json in the model directory and starts using it."""
+        baseline = self.export_baseline()
+        baseline_path = Path(model_dir) / "baseline.json"
+        tmp_path = baseline_path.with_name(baseline_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(baseline, f, indent=4)
+        tmp_path.replace(baseline_path)
+
+        with self._lock:
+            self.baseline = baseline
+        return baseline
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            self._rotate(self.clock())
+            return {
+                "window_seconds": self.window_seconds,
+                "baseline_loaded": self.baseline is not None,
+                "current": self.current.summary(),
+                "current_drift": self.current.drift(self.baseline),
+                "previous": self.previous.summary() if self.previous else None,
+                "previous_drift": self.previous.drift(self.baseline) if self.previous else None,
+            }
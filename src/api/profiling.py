@@ -0,0 +1,191 @@
+import gc
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+from src.api.metrics import gc_pause_ms, stage_allocated_bytes, stage_net_blocks
+
+# Source files of the /predict pipeline, mapped to the stage they belong to.
+# Allocations are attributed to the innermost frame that lives in one of these.
+STAGE_FILES = {
+    "normalize.py": "normalize",
+    "schemas.py": "validation",
+    "features.py": "features",
+    "inference.py": "inference",
+    "fallback.py": "inference",
+    "scheduler.py": "inference",
+    "decision.py": "decision",
+    "monitoring.py": "monitoring",
+    "audit.py": "audit",
+    "capture.py": "capture",
+    "explain.py": "explain",
+    "main.py": "api",
+}
+SRC_DIR = str(Path(__file__).resolve().parents[1])
+
+
+def stage_for_traceback(traceback) -> str:
+    for frame in reversed(traceback):
+        if frame.filename.startswith(SRC_DIR):
+            return STAGE_FILES.get(Path(frame.filename).name, "other")
+    return "other"
+
+
+class _NoopStages:
+    def mark(self, stage: str):
+        pass
+
+    def end(self):
+        pass
+
+
+_NOOP_STAGES = _NoopStages()
+
+
+class _RequestStages:
+    """Measures tracemalloc growth between consecutive marks of one request.
+
+    Holds the profiler's stage lock until end(), so measured requests run
+    one at a time and the process-wide peak is not reset by another request.
+    """
+
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self._ended = False
+        tracemalloc.reset_peak()
+        self._current = tracemalloc.get_traced_memory()[0]
+        self._blocks = sys.getallocatedblocks()
+
+    def mark(self, stage: str):
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sys.getallocatedblocks()
+        stage_allocated_bytes.labels(stage=stage).observe(max(0, peak - self._current))
+        stage_net_blocks.labels(stage=stage).observe(blocks - self._blocks)
+
+        tracemalloc.reset_peak()
+        self._current = current
+        self._blocks = blocks
+
+    def end(self):
+        if not self._ended:
+            self._ended = True
+            self._lock.release()
+
+
+class MemoryProfiler:
+    """Opt-in tracemalloc snapshots and per-stage allocation metrics for /predict.
+
+    Per-stage numbers are only collected inside a stage window opened with
+    profile_stages(n): the next n requests are serialized through a lock so
+    each one is measured alone. Outside a window, and when profiling is
+    disabled, begin() returns a shared no-op so the request path only pays
+    for a method call per stage.
+    """
+
+    def __init__(self, enabled: bool = False, nframes: int = 25):
+        self.enabled = enabled
+        self.nframes = nframes
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+        self._stage_lock = threading.Lock()
+        self._stage_requests = 0
+        if enabled:
+            tracemalloc.start(nframes)
+
+    def profile_stages(self, requests: int) -> int:
+        """Opens a stage window covering the next `requests` requests. Returns the window size."""
+        with self._lock:
+            self._stage_requests = max(0, requests)
+            return self._stage_requests
+
+    def begin(self):
+        """Starts measuring a request if a stage window is open. Callers must call end() on the result."""
+        if not self.enabled or self._stage_requests == 0:
+            return _NOOP_STAGES
+
+        self._stage_lock.acquire()
+        with self._lock:
+            if self._stage_requests == 0:
+                # The window closed while this request waited for its turn
+                self._stage_lock.release()
+                return _NOOP_STAGES
+            self._stage_requests -= 1
+        return _RequestStages(self._stage_lock)
+
+    def _take(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+    @staticmethod
+    def _group(stats) -> dict:
+        by_stage = {}
+        for stat in stats:
+            stage = stage_for_traceback(stat.traceback)
+            entry = by_stage.setdefault(stage, {"size_bytes": 0, "count": 0})
+            entry["size_bytes"] += getattr(stat, "size_diff", stat.size)
+            entry["count"] += getattr(stat, "count_diff", stat.count)
+        return by_stage
+
+    @staticmethod
+    def _top(stats, limit: int) -> list[dict]:
+        top = []
+        for stat in stats[:limit]:
+            frame = stat.traceback[-1]
+            entry = {"location": f"{frame.filename}:{frame.lineno}", "size_bytes": stat.size, "count": stat.count}
+            if hasattr(stat, "size_diff"):
+                entry["size_diff_bytes"] = stat.size_diff
+                entry["count_diff"] = stat.count_diff
+            top.append(entry)
+        return top
+
+    def snapshot(self, limit: int = 20) -> dict:
+        """Takes a snapshot, grouped by pipeline stage, and keeps it as the base for diff()."""
+        with self._lock:
+            snapshot = self._take()
+            self._previous = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        stats = snapshot.statistics("traceback")
+        return {
+            "traced_current_bytes": current,
+            "traced_peak_bytes": peak,
+            "by_stage": self._group(stats),
+            "top": self._top(snapshot.statistics("lineno"), limit),
+        }
+
+    def diff(self, limit: int = 20) -> dict:
+        """Compares a new snapshot to the previous one; the new snapshot becomes the base."""
+        with self._lock:
+            snapshot = self._take()
+            previous, self._previous = self._previous, snapshot
+
+        if previous is None:
+            return {"by_stage": {}, "top": [], "note": "No previous snapshot, this one is now the base"}
+
+        return {
+            "by_stage": self._group(snapshot.compare_to(previous, "traceback")),
+            "top": self._top(snapshot.compare_to(previous, "lineno"), limit),
+        }
+
+
+_gc_started = {}
+
+
+def _gc_callback(phase: str, info: dict):
+    if phase == "start":
+        _gc_started[threading.get_ident()] = time.perf_counter()
+    else:
+        started = _gc_started.pop(threading.get_ident(), None)
+        if started is not None:
+            gc_pause_ms.labels(generation=str(info["generation"])).observe((time.perf_counter() - started) * 1000)
+
+
+def install_gc_timing():
+    """Records every garbage collection pause in gc_pause_ms. Safe to call more than once."""
+    if _gc_callback not in gc.callbacks:
+        gc.callbacks.append(_gc_callback)
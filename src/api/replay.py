@@ -0,0 +1,157 @@
+"""Replays captured /predict traffic with its original arrival pattern.
+
+Usage:
+    python -m src.api.replay capture.jsonl --speed 2
+    python -m src.api.replay capture.jsonl --url http://localhost:8000
+    python -m src.api.replay capture.jsonl --session 1234-ab12cd34
+
+Without --url the requests are driven through the in-process ASGI app.
+A capture is a sample: at speed 1 the replay offers sample_rate times the
+production load, which the report shows as offered vs. production estimate.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from typing import Optional
+
+from src.api.capture import arrival_offsets, load_capture
+
+SCORE_TOLERANCE = 1e-9
+
+
+def percentile(sorted_values: list[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def _send(client, record: dict) -> dict:
+    start = time.perf_counter()
+    try:
+        response = await client.post("/predict", json=record["request"], headers=record.get("headers") or {})
+        status_code = response.status_code
+        body = response.json() if status_code == 200 else None
+    except Exception as e:
+        status_code, body = None, {"error": type(e).__name__}
+    latency = (time.perf_counter() - start) * 1000
+
+    expected = record.get("response") or {}
+    parity = None
+    if record.get("status_code") == 200 and status_code == 200:
+        parity = (
+            body["decision"] == expected.get("decision")
+            and abs(body["risk_score"] - expected.get("risk_score", math.nan)) <= SCORE_TOLERANCE
+        )
+
+    return {
+        "latency_ms": latency,
+        "status_code": status_code,
+        "status_matches": status_code == record.get("status_code"),
+        "parity": parity,
+    }
+
+
+async def replay(records: list[dict], client, speed: float = 1.0) -> dict:
+    """Sends every captured request at its original offset divided by speed.
+
+    Requests are scheduled open-loop, so a slow server does not slow down
+    arrivals and bursts in the capture stay bursts in the replay.
+    """
+    if not records:
+        return summarize([], 0.0, 0.0)
+
+    offsets = arrival_offsets(records)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    lateness = []
+    tasks = []
+
+    for record, offset in zip(records, offsets):
+        due = started + offset / speed
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lateness.append(max(0.0, loop.time() - due) * 1000)
+        tasks.append(asyncio.create_task(_send(client, record)))
+
+    results = await asyncio.gather(*tasks)
+    elapsed = loop.time() - started
+    report = summarize(results, elapsed, max(lateness))
+    report["load"] = load_summary(records, offsets[-1], speed)
+    return report
+
+
+def load_summary(records: list[dict], span: float, speed: float) -> dict:
+    """Offered replay rate next to the production rate the sample stands for.
+
+    Each record represents 1 / sample_rate production requests; records
+    without a sample rate count as themselves.
+    """
+    represented = sum(1.0 / r["sample_rate"] if r.get("sample_rate") else 1.0 for r in records)
+    return {
+        "sessions": len({r.get("session", "") for r in records}),
+        "sample_rates": sorted({r["sample_rate"] for r in records if r.get("sample_rate")}),
+        "captured_span_s": span,
+        "offered_rps": len(records) * speed / span if span > 0 else None,
+        "production_estimate_rps": represented / span if span > 0 else None,
+    }
+
+
+def summarize(results: list[dict], elapsed: float, max_schedule_lag_ms: float) -> dict:
+    latencies = sorted(r["latency_ms"] for r in results)
+    errors = sum(1 for r in results if r["status_code"] is None or r["status_code"] >= 500)
+    checked = [r["parity"] for r in results if r["parity"] is not None]
+
+    return {
+        "requests": len(results),
+        "elapsed_s": elapsed,
+        "throughput_rps": len(results) / elapsed if elapsed > 0 else None,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50),
+            "p90": percentile(latencies, 0.90),
+            "p99": percentile(latencies, 0.99),
+            "p999": percentile(latencies, 0.999),
+            "max": latencies[-1] if latencies else None,
+        },
+        "error_rate": errors / len(results) if results else 0.0,
+        "status_mismatches": sum(1 for r in results if not r["status_matches"]),
+        "decision_parity": sum(checked) / len(checked) if checked else None,
+        "max_schedule_lag_ms": max_schedule_lag_ms,
+    }
+
+
+async def _run(path: str, speed: float, url: Optional[str], session: Optional[str] = None) -> dict:
+    import httpx
+
+    records = load_capture(path, session=session)
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=30.0) as client:
+            return await replay(records, client, speed=speed)
+
+    from src.api.main import app, model_loader
+    if not model_loader.is_loaded:
+        model_loader.load_active_model()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+        return await replay(records, client, speed=speed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay captured /predict traffic")
+    parser.add_argument("capture", help="Capture file written with CAPTURE_PATH")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time scale, 2 replays twice as fast")
+    parser.add_argument("--url", default=None, help="Base URL of a running server (default: in-process app)")
+    parser.add_argument("--session", default=None, help="Only replay one capture session (default: all, merged by wall clock)")
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(args.capture, args.speed, args.url, args.session))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Optional
+
+from src.api.metrics import lane_queue_depth, lane_queue_wait_ms, lane_rejected_total
+
+DEFAULT_LANES = {
+    "realtime": {"weight": 8, "max_queue": 16},
+    "standard": {"weight": 3, "max_queue": 12},
+    "batch": {"weight": 1, "max_queue": 4, "budget_ms": 1000},
+}
+
+
+class LaneFull(Exception):
+    """Raised when a lane's bounded queue cannot take another request."""
+
+
+class Lane:
+    def __init__(self, name: str, weight: int = 1, max_queue: int = 16, budget_ms: Optional[float] = None):
+        self.name = name
+        self.weight = weight
+        self.max_queue = max_queue
+        self.budget_ms = budget_ms
+        self.queue = deque()
+        self.current_weight = 0
+
+
+class LaneScheduler:
+    """Priority lanes with bounded queues feeding a shared pool of inference workers.
+
+    Workers pick the next lane with smooth weighted round robin over the
+    non-empty lanes, so a saturated low-weight lane only gets its share of
+    the workers and cannot starve the others.
+    """
+
+    def __init__(self, lanes: Optional[dict] = None, workers: int = 8):
+        self.lanes = {
+            name: Lane(name, **spec)
+            for name, spec in (lanes or DEFAULT_LANES).items()
+        }
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"lane-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, lane_name: str, fn, *args) -> Future:
+        """Queues fn(*args) on a lane. Raises LaneFull if the lane's queue is at capacity."""
+        lane = self.lanes[lane_name]
+        future = Future()
+        with self._cond:
+            if len(lane.queue) >= lane.max_queue:
+                lane_rejected_total.labels(lane=lane_name).inc()
+                raise LaneFull(f"Lane {lane_name} queue is full ({lane.max_queue})")
+            lane.queue.append((future, fn, args, time.perf_counter()))
+            lane_queue_depth.labels(lane=lane_name).set(len(lane.queue))
+            self._cond.notify()
+        return future
+
+    def _next_lane(self) -> Optional[Lane]:
+        """Smooth weighted round robin over the lanes that have work. Caller holds the lock."""
+        ready = [lane for lane in self.lanes.values() if lane.queue]
+        if not ready:
+            return None
+
+        total = 0
+        best = None
+        for lane in ready:
+            lane.current_weight += lane.weight
+            total += lane.weight
+            if best is None or lane.current_weight > best.current_weight:
+                best = lane
+        best.current_weight -= total
+        return best
+
+    def _work(self):
+        while True:
+            with self._cond:
+                lane = self._next_lane()
+                while lane is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    lane = self._next_lane()
+                future, fn, args, enqueued_at = lane.queue.popleft()
+                lane_queue_depth.labels(lane=lane.name).set(len(lane.queue))
+
+            # Skip work whose caller already gave up and cancelled it
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            lane_queue_wait_ms.labels(lane=lane.name).observe((time.perf_counter() - enqueued_at) * 1000)
+            try:
+                future.set_result(fn(*args))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def shutdown(self):
+        with self._cond:
+            self._shutdown = True
+            for lane in self.lanes.values():
+                while lane.queue:
+                    lane.queue.popleft()[0].cancel()
+            self._cond.notify_all()
+
+
+class PriorityClassifier:
+    """Assigns a /predict request to a lane.
+
+    The lane mapped to the caller's API key is authoritative; otherwise
+    high-value amounts go to the high-value lane and everything else to the
+    default lane. The client-controlled X-Priority header can only demote a
+    request to a lane listed after that one, never promote it. Lanes are
+    listed from highest to lowest priority.
+    """
+
+    def __init__(
+        self,
+        lanes: list[str],
+        default_lane: str = "standard",
+        high_value_lane: str = "realtime",
+        high_value_amount: Optional[float] = 1000.0,
+        api_keys: Optional[dict] = None,
+    ):
+        self.lanes = set(lanes)
+        self.rank = {name: i for i, name in enumerate(lanes)}
+        self.default_lane = default_lane
+        self.high_value_lane = high_value_lane
+        self.high_value_amount = high_value_amount
+        self.api_keys = api_keys or {}
+
+    def classify(self, amount: float, priority: Optional[str] = None, api_key: Optional[str] = None) -> str:
+        if api_key is not None and self.api_keys.get(api_key) in self.lanes:
+            lane = self.api_keys[api_key]
+        elif self.high_value_amount is not None and amount >= self.high_value_amount:
+            lane = self.high_value_lane
+        else:
+            lane = self.default_lane
+
+        requested = priority.strip().lower() if priority is not None else None
+        if requested in self.lanes and self.rank[requested] > self.rank[lane]:
+            return requested
+        return lane
+
+
+def load_priority_config(config_dir: str = "configs") -> dict:
+    """Reads configs/priority_lanes.json, falling back to the built-in lanes if it is missing."""
+    config_path = Path(config_dir) / "priority_lanes.json"
+    if not config_path.exists():
+        return {"lanes": DEFAULT_LANES}
+
+    with open(config_path, 'r') as f:
+        return json.load(f)
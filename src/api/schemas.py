@@ -1,6 +1,6 @@
 from datetime import datetime
 from pydantic import BaseModel, field_validator
-from typing import Literal, List
+from typing import Literal, List, Optional
 import uuid
 
 class Transaction(BaseModel):
@@ -59,6 +59,8 @@ class PredictResponse(BaseModel):
     
     model_version: str
     processed_at: datetime
+    fallback_used: bool = False
+    explanation: Optional[dict] = None
 
 class FieldError(BaseModel):
     field: str
@@ -0,0 +1,297 @@
+"""Compacts tree ensembles into flat arrays for lower memory and faster scoring.
+
+Usage:
+    python -m src.model.compact v1 v1c --validation validation.csv
+
+Writes models/v1c/ (model.pkl, meta.json, and fallback.json/baseline.json if
+present) only if the compacted model makes the same decisions as the original
+on the validation set.
+"""
+
+import argparse
+import json
+import pickle
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.model.decision import map_decision
+from src.model.loader import _load_measured
+
+LEAF = -1
+
+
+class CompactionUnsupported(Exception):
+    """Raised when the model is not a tree ensemble that can be compacted."""
+
+
+def _round_down_float32(thresholds: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each threshold.
+
+    sklearn compares float32 inputs against float64 thresholds; for float32 x,
+    x <= t holds exactly when x <= round_down_float32(t), so splits are unchanged.
+    """
+    rounded = thresholds.astype(np.float32)
+    too_big = rounded.astype(np.float64) > thresholds
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+class CompactTreeEnsemble:
+    """Binary tree classifier (single tree or bagged forest) stored as flat arrays.
+
+    All trees share one set of node arrays with global child indexes; node
+    values hold the positive-class probability. NaN inputs follow each
+    split's learned missing-value direction, as in sklearn. Training-time
+    state (sample weights, impurity, per-tree Python objects) is dropped.
+    """
+
+    def __init__(self, estimator, preprocess=None, value_dtype: str = "float32"):
+        trees = estimator.estimators_ if hasattr(estimator, "estimators_") else [estimator]
+        self.preprocess = preprocess
+        self.feature_names = list(getattr(estimator, "feature_names_in_", [])) or None
+        self.value_dtype = value_dtype
+
+        features, thresholds, lefts, rights, missing_left, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            t = tree.tree_
+            proba = t.value[:, 0, :]
+            proba = proba[:, 1] / proba.sum(axis=1)
+            is_leaf = t.children_left < 0
+
+            roots.append(offset)
+            features.append(np.where(is_leaf, LEAF, t.feature))
+            thresholds.append(t.threshold)
+            lefts.append(np.where(is_leaf, 0, t.children_left + offset))
+            rights.append(np.where(is_leaf, 0, t.children_right + offset))
+            # sklearn < 1.3 has no missing-value support, NaN always went right there
+            missing_left.append(getattr(t, "missing_go_to_left", np.zeros(t.node_count, dtype=np.uint8)))
+            values.append(proba)
+            offset += t.node_count
+
+        self.n_features = trees[0].tree_.n_features
+        self.feature = np.concatenate(features).astype(np.int16 if self.n_features < 2 ** 15 else np.int32)
+        self.threshold = _round_down_float32(np.concatenate(thresholds))
+        self.left = np.concatenate(lefts).astype(np.int32)
+        self.right = np.concatenate(rights).astype(np.int32)
+        self.missing_left = np.concatenate(missing_left).astype(bool)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = max(tree.tree_.max_depth for tree in trees)
+        self.classes_ = np.array([0, 1])
+
+        node_values = np.concatenate(values)
+        if value_dtype == "uint16":
+            # Quantized probabilities, decoded with value / 65535
+            self.value = np.round(node_values * 65535).astype(np.uint16)
+        else:
+            self.value = node_values.astype(np.float32)
+
+    def _node_values(self, nodes: np.ndarray) -> np.ndarray:
+        values = self.value[nodes].astype(np.float64)
+        if self.value_dtype == "uint16":
+            values /= 65535
+        return values
+
+    def _input(self, input_data) -> np.ndarray:
+        if self.preprocess is not None:
+            input_data = self.preprocess.transform(input_data)
+        elif self.feature_names is not None and isinstance(input_data, pd.DataFrame):
+            input_data = input_data[self.feature_names]
+        if hasattr(input_data, "toarray"):
+            input_data = input_data.toarray()
+        return np.asarray(input_data, dtype=np.float32)
+
+    def _traverse(self, X: np.ndarray, contributions: Optional[np.ndarray] = None) -> np.ndarray:
+        """Walks every (row, tree) pair down one level per step. Returns leaf indexes."""
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            feature = self.feature[nodes]
+            internal = feature != LEAF
+            if not internal.any():
+                break
+            split_feature = np.where(internal, feature, 0)
+            x = X[rows, split_feature]
+            go_left = np.where(np.isnan(x), self.missing_left[nodes], x <= self.threshold[nodes])
+            children = np.where(internal, np.where(go_left, self.left[nodes], self.right[nodes]), nodes)
+            if contributions is not None:
+                delta = np.where(internal, self._node_values(children) - self._node_values(nodes), 0.0)
+                np.add.at(contributions, (np.broadcast_to(rows, nodes.shape), split_feature), delta)
+            nodes = children
+        return nodes
+
+    def predict_proba(self, input_data) -> np.ndarray:
+        X = self._input(input_data)
+        positive = self._node_values(self._traverse(X)).mean(axis=1)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, input_data) -> np.ndarray:
+        return (self.predict_proba(input_data)[:, 1] >= 0.5).astype(int)
+
+    def explain(self, input_data) -> list[dict]:
+        """Path-based contributions, same semantics as explain_batch for sklearn trees."""
+        X = self._input(input_data)
+        contributions = np.zeros((X.shape[0], self.n_features))
+        self._traverse(X, contributions)
+        contributions /= len(self.roots)
+        base_value = float(self._node_values(self.roots).mean())
+
+        if self.preprocess is not None:
+            try:
+                names = list(self.preprocess.get_feature_names_out())
+            except Exception:
+                names = [f"x{i}" for i in range(self.n_features)]
+        else:
+            names = self.feature_names or [f"x{i}" for i in range(self.n_features)]
+
+        return [
+            {
+                "method": "tree_path",
+                "output": "probability",
+                "base_value": base_value,
+                "contributions": dict(zip(names, map(float, row))),
+            }
+            for row in contributions
+        ]
+
+    def nbytes(self) -> int:
+        arrays = (self.feature, self.threshold, self.left, self.right, self.missing_left, self.value, self.roots)
+        return sum(a.nbytes for a in arrays)
+
+
+def compact_model(model, value_dtype: str = "float32") -> CompactTreeEnsemble:
+    """Builds a CompactTreeEnsemble from a fitted binary sklearn tree/forest, optionally in a Pipeline."""
+    preprocess, estimator = None, model
+    if hasattr(model, "steps"):
+        preprocess, estimator = model[:-1], model[-1]
+
+    trees = getattr(estimator, "estimators_", [estimator])
+    if hasattr(estimator, "learning_rate") or not all(hasattr(t, "tree_") for t in trees):
+        raise CompactionUnsupported(f"Cannot compact {type(estimator).__name__}, only trees and bagged forests")
+    if len(getattr(estimator, "classes_", [])) != 2:
+        raise CompactionUnsupported("Only binary classifiers can be compacted")
+
+    return CompactTreeEnsemble(estimator, preprocess=preprocess, value_dtype=value_dtype)
+
+
+def check_parity(original, compacted, validation_df: pd.DataFrame) -> dict:
+    """Compares scores and map_decision buckets of two models on a validation set."""
+    original_scores = original.predict_proba(validation_df)[:, 1]
+    compacted_scores = compacted.predict_proba(validation_df)[:, 1]
+
+    mismatches = sum(
+        map_decision(float(a)) != map_decision(float(b))
+        for a, b in zip(original_scores, compacted_scores)
+    )
+    return {
+        "rows": len(validation_df),
+        "max_abs_score_diff": float(np.max(np.abs(original_scores - compacted_scores))) if len(validation_df) else 0.0,
+        "decision_mismatches": int(mismatches),
+        "passed": mismatches == 0,
+    }
+
+
+def measure(model, validation_df: pd.DataFrame, repeats: int = 200) -> dict:
+    """Memory once loaded, serialized size and single-row / batch predict_proba latency.
+
+    resident_bytes is measured the way ModelLoader reports model_size_bytes:
+    the tracemalloc growth across unpickling the model.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = Path(tmp_dir) / "model.pkl"
+        with open(model_path, 'wb') as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _, resident_bytes = _load_measured(model_path)
+        pickled_bytes = model_path.stat().st_size
+
+    row = validation_df.head(1)
+    single = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        single.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    model.predict_proba(validation_df)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "resident_bytes": resident_bytes,
+        "pickled_bytes": pickled_bytes,
+        "single_row_p50_ms": float(np.median(single)),
+        "batch_ms": batch_ms,
+    }
+
+
+def load_validation(path: str) -> pd.DataFrame:
+    """Reads a validation set from CSV, or JSON lines of feature dicts / captured requests."""
+    if path.endswith(".csv"):
+        return pd.read_csv(path)
+
+    from src.api.schemas import PredictRequest
+    from src.model.features import build_feature_dict
+    from src.model.normalize import normalize_request
+
+    rows = []
+    with open(path, 'r', encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "request" in record:
+                req = normalize_request(PredictRequest.model_validate(record["request"]))
+                record = build_feature_dict(req)
+            rows.append(record)
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact a tree ensemble model into flat float32 arrays")
+    parser.add_argument("version", help="Model version to compact, e.g. v1")
+    parser.add_argument("out_version", help="Model version to write the compacted model to")
+    parser.add_argument("--validation", required=True, help="CSV or JSON lines validation set for the parity check")
+    parser.add_argument("--values", choices=["float32", "uint16"], default="float32", help="Leaf value storage")
+    parser.add_argument("--models-dir", default="models")
+    args = parser.parse_args()
+
+    source_dir = Path(args.models_dir) / args.version
+    with open(source_dir / "model.pkl", 'rb') as f:
+        original = pickle.load(f)
+
+    compacted = compact_model(original, value_dtype=args.values)
+    validation_df = load_validation(args.validation)
+    parity = check_parity(original, compacted, validation_df)
+    report = {
+        "parity": parity,
+        "before": measure(original, validation_df),
+        "after": measure(compacted, validation_df),
+    }
+    print(json.dumps(report, indent=2))
+
+    if not parity["passed"]:
+        raise SystemExit("Parity check failed, compacted model not written")
+
+    out_dir = Path(args.models_dir) / args.out_version
+    out_dir.mkdir(parents=True, exist_ok=False)
+    with open(out_dir / "model.pkl", 'wb') as f:
+        pickle.dump(compacted, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    with open(source_dir / "meta.json", 'r') as f:
+        meta = json.load(f)
+    meta.update({"model_version": args.out_version, "compacted_from": args.version, "compaction": report})
+    with open(out_dir / "meta.json", 'w') as f:
+        json.dump(meta, f, indent=4)
+
+    for name in ("fallback.json", "baseline.json"):
+        if (source_dir / name).exists():
+            shutil.copy(source_dir / name, out_dir / name)
+
+
+if __name__ == "__main__":
+    main()
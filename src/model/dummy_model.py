@@ -6,4 +6,16 @@ class DummyModel:
     
     def predict_proba(self, input_data):
         num_samples = len(input_data)
-        return np.array([[0.5, 0.5]] * len(input_data))  # Dummy probabilities===
\ No newline at end of file
+        return np.array([[0.5, 0.5]] * len(input_data))  # Dummy probabilities===
+
+    def explain(self, input_data):
+        # Constant model: every feature contributes nothing
+        return [
+            {
+                "method": "constant",
+                "output": "probability",
+                "base_value": 0.5,
+                "contributions": {column: 0.0 for column in input_data.columns},
+            }
+            for _ in range(len(input_data))
+        ]
@@ -0,0 +1,156 @@
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class ExplanationUnavailable(Exception):
+    """Raised when the model type has no supported explanation method."""
+
+
+def _split_pipeline(model, features_df: pd.DataFrame):
+    """Returns (final_estimator, model_input, feature_names) for plain models and sklearn Pipelines."""
+    if hasattr(model, "steps"):
+        preprocess, estimator = model[:-1], model[-1]
+        X = preprocess.transform(features_df)
+        try:
+            names = list(preprocess.get_feature_names_out())
+        except Exception:
+            names = [f"x{i}" for i in range(X.shape[1])]
+        return estimator, X, names
+    return model, features_df, list(features_df.columns)
+
+
+def _positive_class_values(tree, classifier: bool) -> np.ndarray:
+    values = tree.tree_.value[:, 0, :]
+    if classifier:
+        return values[:, 1] / values.sum(axis=1)
+    return values[:, 0]
+
+
+def _tree_contributions(tree, X, classifier: bool) -> tuple[np.ndarray, float]:
+    """Exact path-based contributions for one fitted sklearn tree, for every row of X.
+
+    Each split on the decision path credits the change in node value to the
+    feature it split on, so bias + sum(contributions) equals the tree output.
+    """
+    t = tree.tree_
+    values = _positive_class_values(tree, classifier)
+
+    internal = np.where(t.children_left >= 0)[0]
+    parent = np.full(t.node_count, -1)
+    parent[t.children_left[internal]] = internal
+    parent[t.children_right[internal]] = internal
+
+    # Row n holds the change in value on entering node n, under the feature its parent split on
+    child = np.where(parent >= 0)[0]
+    deltas = np.zeros((t.node_count, t.n_features))
+    deltas[child, t.feature[parent[child]]] = values[child] - values[parent[child]]
+
+    # decision_path is a sparse node indicator, so the product sums the deltas along each path
+    contributions = np.asarray(tree.decision_path(X) @ deltas)
+    return contributions, float(values[0])
+
+
+def explain_batch(model, features_df: pd.DataFrame) -> list[dict]:
+    """Per-feature contributions for every row of features_df, computed in one vectorized pass.
+
+    Supports models exposing their own explain(features_df), sklearn trees and
+    forests (path-based, probability output), gradient boosting (path-based,
+    log-odds output) and linear models (coefficient-based, log-odds output),
+    optionally wrapped in a Pipeline.
+    """
+    if hasattr(model, "explain"):
+        return model.explain(features_df)
+
+    estimator, X, names = _split_pipeline(model, features_df)
+    n_rows = X.shape[0]
+    # Sub-estimators of ensembles are fitted without feature names
+    X_values = X.to_numpy() if isinstance(X, pd.DataFrame) else X
+
+    if hasattr(estimator, "tree_"):
+        contributions, bias = _tree_contributions(estimator, X, hasattr(estimator, "classes_"))
+        method, output, biases = "tree_path", "probability", np.full(n_rows, bias)
+
+    elif hasattr(estimator, "estimators_") and hasattr(estimator, "learning_rate"):
+        # Gradient boosting: trees are regressors on the raw margin
+        contributions = np.zeros((n_rows, len(names)))
+        for tree in np.asarray(estimator.estimators_).reshape(-1):
+            tree_contributions, _ = _tree_contributions(tree, X_values, classifier=False)
+            contributions += estimator.learning_rate * tree_contributions
+        raw = np.asarray(estimator.decision_function(X)).reshape(n_rows)
+        method, output, biases = "tree_path", "log_odds", raw - contributions.sum(axis=1)
+
+    elif hasattr(estimator, "estimators_"):
+        # Bagged forests average the trees
+        contributions = np.zeros((n_rows, len(names)))
+        bias = 0.0
+        for tree in estimator.estimators_:
+            tree_contributions, tree_bias = _tree_contributions(tree, X_values, hasattr(tree, "classes_"))
+            contributions += tree_contributions
+            bias += tree_bias
+        contributions /= len(estimator.estimators_)
+        method, output, biases = "tree_path", "probability", np.full(n_rows, bias / len(estimator.estimators_))
+
+    elif hasattr(estimator, "coef_"):
+        coef = np.asarray(estimator.coef_).reshape(-1, len(names))[-1]
+        intercept = float(np.asarray(getattr(estimator, "intercept_", 0.0)).reshape(-1)[-1])
+        dense = X.toarray() if hasattr(X, "toarray") else np.asarray(X, dtype=float)
+        contributions = dense * coef
+        method, output, biases = "linear", "log_odds", np.full(n_rows, intercept)
+
+    else:
+        raise ExplanationUnavailable(f"Explanations are not supported for {type(estimator).__name__}")
+
+    return [
+        {
+            "method": method,
+            "output": output,
+            "base_value": float(biases[i]),
+            "contributions": dict(zip(names, map(float, contributions[i]))),
+        }
+        for i in range(n_rows)
+    ]
+
+
+def explain(model, features_df: pd.DataFrame) -> dict:
+    """Per-feature contributions for a single-row DataFrame."""
+    return explain_batch(model, features_df)[0]
+
+
+class ExplanationCache:
+    """Bounded LRU of explanations keyed on model_version and feature vector."""
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_version: str, features: dict) -> tuple:
+        return (model_version, tuple(sorted(features.items())))
+
+    def get(self, model_version: str, features: dict) -> Optional[dict]:
+        key = self.key(model_version, features)
+        with self._lock:
+            explanation = self._entries.get(key)
+            if explanation is not None:
+                self._entries.move_to_end(key)
+            return explanation
+
+    def put(self, model_version: str, features: dict, explanation: dict):
+        key = self.key(model_version, features)
+        with self._lock:
+            self._entries[key] = explanation
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, model, model_version: str, features: dict, features_df: pd.DataFrame) -> dict:
+        explanation = self.get(model_version, features)
+        if explanation is None:
+            explanation = explain(model, features_df)
+            self.put(model_version, features, explanation)
+        return explanation
@@ -0,0 +1,139 @@
+"""Cheap fallback scorer used when the primary model misses its latency budget.
+
+Fit fallback.json by distilling the primary model on a validation set:
+    python -m src.model.fallback v1 --validation validation.jsonl
+"""
+
+import argparse
+import json
+import math
+import pickle
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+
+class FallbackScorer:
+    """Cheap logistic scorer used when the primary model misses its latency budget.
+
+    Loaded from models/{version}/fallback.json:
+        {
+            "intercept": -1.0,
+            "numeric": {"amount": {"weight": 0.2, "transform": "log1p"}},
+            "categorical": {"country": {"NG": 1.5}, "device_type": {"unknown": 0.4}}
+        }
+    Categorical values missing from a table contribute 0.
+    """
+
+    def __init__(self, intercept: float = 0.0, numeric: Optional[dict] = None, categorical: Optional[dict] = None):
+        self.intercept = intercept
+        self.numeric = numeric or {}
+        self.categorical = categorical or {}
+
+    def score(self, features: dict) -> float:
+        """Returns a risk score between 0.0 and 1.0 for a feature dict."""
+        z = self.intercept
+        for name, spec in self.numeric.items():
+            value = float(features.get(name) or 0.0)
+            if spec.get("transform") == "log1p":
+                value = math.log1p(max(value, 0.0))
+            z += spec.get("weight", 0.0) * value
+        for name, table in self.categorical.items():
+            z += table.get(features.get(name), 0.0)
+        return 1.0 / (1.0 + math.exp(-z))
+
+
+def load_fallback(model_dir: Path) -> Optional[FallbackScorer]:
+    """Loads fallback.json from the model directory. Returns None if it does not exist."""
+    fallback_path = Path(model_dir) / "fallback.json"
+    if not fallback_path.exists():
+        return None
+
+    with open(fallback_path, 'r') as f:
+        spec = json.load(f)
+
+    return FallbackScorer(
+        intercept=spec.get("intercept", 0.0),
+        numeric=spec.get("numeric"),
+        categorical=spec.get("categorical"),
+    )
+
+
+
+CATEGORICAL_FEATURES = ["currency", "country", "merchant_category", "device_type"]
+
+
+def fit_fallback(model, features_df, min_count: int = 20, l2: float = 1.0) -> dict:
+    """Distills the primary model into fallback.json parameters.
+
+    Fits a ridge regression of the model's log-odds on log1p(amount) and on
+    one-hot categorical values seen at least min_count times, so the
+    fallback scorer approximates the model it stands in for. A model with a
+    constant score yields zero weights and that constant as intercept.
+    """
+    scores = np.clip(np.asarray(model.predict_proba(features_df))[:, 1].astype(float), 1e-6, 1 - 1e-6)
+    target = np.log(scores / (1 - scores))
+
+    columns = [np.log1p(np.maximum(features_df["amount"].to_numpy(dtype=float), 0.0))]
+    terms = [("amount", None)]
+    for name in CATEGORICAL_FEATURES:
+        if name not in features_df:
+            continue
+        counts = features_df[name].value_counts()
+        for value in sorted(counts[counts >= min_count].index):
+            columns.append((features_df[name] == value).to_numpy(dtype=float))
+            terms.append((name, value))
+
+    X = np.column_stack(columns)
+    X_mean, y_mean = X.mean(axis=0), target.mean()
+    Xc = X - X_mean
+    weights = np.linalg.solve(Xc.T @ Xc + l2 * np.eye(X.shape[1]), Xc.T @ (target - y_mean))
+    weights[np.abs(weights) < 1e-9] = 0.0
+
+    spec = {"intercept": float(y_mean - X_mean @ weights), "numeric": {}, "categorical": {}}
+    for (name, value), weight in zip(terms, weights):
+        if value is None:
+            spec["numeric"][name] = {"weight": float(weight), "transform": "log1p"}
+        elif weight != 0.0:
+            # Values missing from a table contribute 0, so zero weights are left out
+            spec["categorical"].setdefault(name, {})[str(value)] = float(weight)
+    return spec
+
+
+def main():
+    from src.model.compact import load_validation
+    from src.model.decision import map_decision
+
+    parser = argparse.ArgumentParser(description="Fit fallback.json by distilling the primary model")
+    parser.add_argument("version", help="Model version to fit the fallback for, e.g. v1")
+    parser.add_argument("--validation", required=True, help="CSV or JSON lines set of features or captured requests")
+    parser.add_argument("--min-count", type=int, default=20, help="Minimum occurrences for a categorical value")
+    parser.add_argument("--models-dir", default="models")
+    args = parser.parse_args()
+
+    model_dir = Path(args.models_dir) / args.version
+    with open(model_dir / "model.pkl", 'rb') as f:
+        model = pickle.load(f)
+
+    features_df = load_validation(args.validation)
+    spec = fit_fallback(model, features_df, min_count=args.min_count)
+
+    scorer = FallbackScorer(spec["intercept"], spec["numeric"], spec["categorical"])
+    primary = np.asarray(model.predict_proba(features_df))[:, 1]
+    agreement = np.mean([
+        map_decision(float(p)) == map_decision(scorer.score(row))
+        for p, row in zip(primary, features_df.to_dict(orient="records"))
+    ])
+    spec["description"] = (
+        f"Distilled from {args.version} on {len(features_df)} rows; "
+        f"decision agreement with the primary model {agreement:.1%}"
+    )
+
+    with open(model_dir / "fallback.json", 'w') as f:
+        json.dump(spec, f, indent=4)
+    print(json.dumps(spec, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,24 @@
 import pandas as pd
 from src.api.schemas import PredictRequest
 
-def build_features(req: PredictRequest) -> pd.DataFrame:
-    """Convert PredictRequest to a DataFrame suitable for model input."""
+FEATURE_COLUMNS = ["amount", "currency", "country", "merchant_category", "device_type"]
+
+def transaction_features(txn) -> dict:
+    """Extract the model features of a normalized transaction as a plain dict."""
+    return {column: getattr(txn, column) for column in FEATURE_COLUMNS}
 
-    txn = req.transaction
+def build_feature_dict(req: PredictRequest) -> dict:
+    """Extract the model features of a PredictRequest as a plain dict."""
+    return transaction_features(req.transaction)
 
-    features = {
-        "amount": txn.amount,
-        "currency": txn.currency,
-        "country": txn.country,
-        "merchant_category": txn.merchant_category,
-        "device_type": txn.device_type,
-    }
+def features_to_frame(features: dict) -> pd.DataFrame:
+    """Wrap a feature dict in a single-row DataFrame suitable for model input."""
+    return pd.DataFrame([features])
 
-    df = pd.DataFrame([features])
+def build_features(req: PredictRequest) -> pd.DataFrame:
+    """Convert PredictRequest to a DataFrame suitable for model input."""
+    return features_to_frame(build_feature_dict(req))
 
-    return df
\ No newline at end of file
+def build_batch_features(features: list[dict]) -> pd.DataFrame:
+    """Stack several feature dicts into one DataFrame so the model scores them in a single call."""
+    return pd.DataFrame(features)
@@ -0,0 +1,61 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from typing import Optional
+
+from src.model.fallback import FallbackScorer
+
+
+class InferenceTimeout(Exception):
+    """Raised when the model misses its latency budget and there is no fallback."""
+
+
+class BudgetedInference:
+    """Runs the primary model under a per-request latency budget.
+
+    The model runs on a dedicated pool, or on a lane scheduler when one is
+    given. If it has not answered within the budget the fallback scorer
+    answers instead; a call that has not started yet is cancelled, one that
+    is already running finishes in the background and its result is discarded.
+    """
+
+    def __init__(self, budget_ms: float = 50.0, max_workers: int = 8, scheduler=None):
+        self.budget_ms = budget_ms
+        self.scheduler = scheduler
+        self._executor = None
+        if scheduler is None:
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+
+    def score(
+        self,
+        model,
+        features_df,
+        features: dict,
+        fallback: Optional[FallbackScorer] = None,
+        lane: str = "standard",
+        budget_ms: Optional[float] = None,
+    ) -> tuple[float, bool]:
+        """Returns (risk_score, used_fallback).
+
+        Model exceptions are re-raised as they are. A timeout without a
+        fallback raises InferenceTimeout. budget_ms overrides the default budget.
+        """
+        budget_ms = budget_ms if budget_ms is not None else self.budget_ms
+        if self.scheduler is not None:
+            future = self.scheduler.submit(lane, model.predict_proba, features_df)
+        else:
+            future = self._executor.submit(model.predict_proba, features_df)
+
+        try:
+            risk_proba = future.result(timeout=budget_ms / 1000)
+        except FuturesTimeout:
+            future.cancel()
+            if fallback is None:
+                raise InferenceTimeout(f"Model did not answer within {budget_ms} ms")
+            return fallback.score(features), True
+
+        return float(risk_proba[0][1]), False
+
+    def shutdown(self):
+        if self.scheduler is not None:
+            self.scheduler.shutdown()
+        else:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,8 +1,36 @@
 import json
+import logging
 import pickle
+import tracemalloc
 from pathlib import Path
 from typing import Optional
 
+from src.model.fallback import load_fallback
+
+logger = logging.getLogger("ml_inference_system")
+
+
+def _load_measured(model_path: Path) -> tuple[object, int]:
+    """Unpickles the model and returns it with the memory it occupies once loaded.
+
+    The size is the tracemalloc growth across pickle.load (numpy buffers are
+    traced too), which is what the model adds to the process, unlike the
+    pickle size on disk. tracemalloc is only started for the load if it is
+    not already running.
+    """
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        with open(model_path, 'rb') as f:
+            model = pickle.load(f)
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return model, max(size, 0)
+
 class ModelLoader:
     """Loads and manages the active ML model."""
 
@@ -13,6 +41,9 @@ class ModelLoader:
         # These will hold the active model and its metadata
         self.model = None
         self.metadata = None
+        self.model_dir = None
+        self.fallback = None
+        self.model_size_bytes = 0
         self.is_loaded = False
 
 
@@ -41,7 +72,7 @@ class ModelLoader:
         with open(meta_path, 'r') as f:
             self.metadata = json.load(f)
 
-        print(f"Loaded metadata: {self.metadata}")
+        logger.info(f"Loaded metadata for model version {self.metadata.get('model_version', active_version)}")
     
         # Loads the model.pkl file
         model_path = model_dir / "model.pkl"
@@ -49,11 +80,14 @@ class ModelLoader:
         if not model_path.exists():
             raise FileNotFoundError(f"Model file not found at {model_path}")
         
-        with open(model_path, 'rb') as f:
-            self.model = pickle.load(f)
+        self.model, self.model_size_bytes = _load_measured(model_path)
+
+        # Optional cheap scorer used when the model misses its latency budget
+        self.fallback = load_fallback(model_dir)
 
+        self.model_dir = model_dir
         self.is_loaded = True
-        print(f"Model version {active_version} loaded successfully")
+        logger.info(f"Model version {active_version} loaded successfully")
         
 
     def predict(self, input_data):
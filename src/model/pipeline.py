@@ -0,0 +1,209 @@
+"""Per-thread reusable pipeline contexts for /predict.
+
+In reuse mode normalization writes into a __slots__ TransactionRecord and
+features are written into preallocated one-element column arrays that back a
+single-row DataFrame, so the steady-state request path creates no pydantic
+copies, dicts or DataFrames. The features are exposed as a read-only mapping
+over the record, so drift monitoring and the fallback read them in place. Column dtypes match build_features (amount is
+float64), so dtype-driven preprocessing sees the same input in both modes.
+
+Microbenchmark:
+    python -m src.model.pipeline
+"""
+
+import threading
+import time
+import tracemalloc
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+from src.api.monitoring import DriftMonitor
+from src.api.schemas import PredictRequest
+from src.model.features import FEATURE_COLUMNS, features_to_frame, transaction_features
+from src.model.normalize import normalize_optional_string, normalize_request
+
+# Same dtypes pandas infers in build_features; all other columns are object
+COLUMN_DTYPES = {"amount": np.float64}
+
+
+class TransactionRecord:
+    """Normalized transaction fields, reused across requests on one worker thread.
+
+    Exposes the same attribute names as schemas.Transaction, so code after
+    normalization can use either.
+    """
+
+    __slots__ = (
+        "transaction_id",
+        "user_id",
+        "amount",
+        "currency",
+        "country",
+        "merchant_category",
+        "device_type",
+    )
+
+    def fill(self, txn):
+        """Normalizes a schemas.Transaction into this record, same rules as normalize_request."""
+        self.transaction_id = txn.transaction_id.strip()
+        self.user_id = txn.user_id.strip()
+        self.amount = txn.amount
+        self.currency = txn.currency.strip().upper()
+        self.country = txn.country.strip().upper()
+        self.merchant_category = normalize_optional_string(txn.merchant_category)
+        self.device_type = normalize_optional_string(txn.device_type)
+        return self
+
+    def model_dump(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class RecordFeatures(Mapping):
+    """Read-only feature mapping over a TransactionRecord, reused across requests.
+
+    Reads the record's current values, so anything that must outlive the
+    request (e.g. the audit record) takes a copy with dict().
+    """
+
+    __slots__ = ("record",)
+
+    def __init__(self, record: TransactionRecord):
+        self.record = record
+
+    def __getitem__(self, column: str):
+        if column not in FEATURE_COLUMNS:
+            raise KeyError(column)
+        return getattr(self.record, column)
+
+    def __iter__(self):
+        return iter(FEATURE_COLUMNS)
+
+    def __len__(self) -> int:
+        return len(FEATURE_COLUMNS)
+
+
+class PipelineContext:
+    """Reusable record and typed model input columns for one worker thread."""
+
+    def __init__(self):
+        self.record = TransactionRecord()
+        self.features = RecordFeatures(self.record)
+        self.columns = {
+            column: np.empty(1, dtype=COLUMN_DTYPES.get(column, object))
+            for column in FEATURE_COLUMNS
+        }
+        self.frame = pd.DataFrame(self.columns, columns=FEATURE_COLUMNS, copy=False)
+        self._frame_is_view = self._check_view()
+
+    def _check_view(self) -> bool:
+        """The frame only tracks the columns if pandas did not copy them (e.g. copy-on-write mode)."""
+        for i, values in enumerate(self.columns.values()):
+            # object() only compares equal to itself
+            probe = object() if values.dtype == object else 1.5
+            values[0] = probe
+            is_view = self.frame.iat[0, i] == probe
+            values[0] = None if values.dtype == object else np.nan
+            if not is_view:
+                return False
+        return True
+
+    def normalize(self, req: PredictRequest) -> TransactionRecord:
+        return self.record.fill(req.transaction)
+
+    def build_frame(self) -> pd.DataFrame:
+        """Writes the record's features into the shared columns and returns the frame backed by them."""
+        for column, values in self.columns.items():
+            values[0] = getattr(self.record, column)
+        if not self._frame_is_view:
+            return pd.DataFrame({column: values.copy() for column, values in self.columns.items()})
+        return self.frame
+
+
+class PipelineContexts:
+    """Hands out one PipelineContext per thread."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self) -> PipelineContext:
+        context = getattr(self._local, "context", None)
+        if context is None:
+            context = PipelineContext()
+            self._local.context = context
+        return context
+
+
+def _standard(req: PredictRequest, monitor: DriftMonitor):
+    txn = normalize_request(req).transaction
+    features = transaction_features(txn)
+    features_df = features_to_frame(features)
+    monitor.observe(features, 0.5, "review")
+    return features_df
+
+
+def _reuse(req: PredictRequest, contexts: PipelineContexts, monitor: DriftMonitor):
+    context = contexts.get()
+    context.normalize(req)
+    features_df = context.build_frame()
+    monitor.observe(context.features, 0.5, "review")
+    return features_df
+
+
+def benchmark(iterations: int = 20000) -> dict:
+    """Compares the /predict stages that differ between standard and reuse mode.
+
+    Covers normalization, features, the model input frame and drift
+    monitoring, as predict() runs them. Inference, the PredictResponse, the
+    audit record (a copy that outlives the request), logging and metrics are
+    the same in both modes and left out.
+
+    Reports time per request and bytes allocated per request, measured as
+    the tracemalloc peak growth of one iteration (a lower bound on churn,
+    since memory freed mid-request is reused).
+    """
+    req = PredictRequest.model_validate({
+        "request_id": "123e4567-e89b-12d3-a456-426614174000",
+        "event_time": "2026-01-31T10:00:00Z",
+        "transaction": {
+            "transaction_id": " txn_001 ",
+            "user_id": "user_123",
+            "amount": 100.0,
+            "currency": "usd",
+            "country": "us",
+            "merchant_category": "Electronics",
+            "device_type": None,
+        },
+    })
+    contexts = PipelineContexts()
+    monitor = DriftMonitor()
+    modes = {"standard": lambda: _standard(req, monitor), "reuse": lambda: _reuse(req, contexts, monitor)}
+
+    report = {}
+    for name, run in modes.items():
+        run()
+
+        tracemalloc.start()
+        run()
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        run()
+        allocated = tracemalloc.get_traced_memory()[1] - start_bytes
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            run()
+        elapsed = time.perf_counter() - start
+
+        report[name] = {
+            "us_per_request": elapsed / iterations * 1e6,
+            "bytes_allocated_per_request": allocated,
+        }
+    return report
+
+
+if __name__ == "__main__":
+    import json
+    print(json.dumps(benchmark(), indent=2))
@@ -0,0 +1,295 @@
+"""Scores transaction events from a stream instead of over HTTP.
+
+Usage:
+    python -m src.stream.consumer events.jsonl results.jsonl --workers 4
+
+Each worker process owns one partition of the input log (line % workers),
+its own offsets file and its own results file (results.jsonl.{partition}),
+and serves its Prometheus metrics on --metrics-port + partition.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from prometheus_client import start_http_server
+from pydantic import ValidationError
+
+from src.api.metrics import (
+    consumer_records_total,
+    consumer_lag,
+    consumer_batch_size,
+    consumer_batch_latency_ms,
+)
+from src.api.schemas import PredictRequest
+from src.model.decision import map_decision
+from src.model.features import build_feature_dict, build_batch_features
+from src.model.loader import ModelLoader
+from src.model.normalize import normalize_request
+
+logger = logging.getLogger("ml_inference_system")
+
+
+class StreamConsumer:
+    """Pulls events from a source, scores them in adaptive micro-batches and publishes to a sink.
+
+    Delivery is at-least-once: the source is only committed after the sink
+    accepted the whole batch. If scoring or publishing fails the source is
+    rewound and the batch is redelivered after a backoff.
+
+    A scoring failure halves the batch on every retry to isolate the record
+    that causes it. When a single record still fails, another record (the one
+    after it, or else the last record that scored fine) is scored as a
+    control: if the control scores, the record is published with status
+    "error" (dead-lettered) and committed, so one bad record cannot stall the
+    partition. If the control fails too the model itself is down, and the
+    record is retried with backoff without committing until it recovers.
+    Publish failures are retried with the same batch.
+
+    Batch size adapts to target_batch_ms: it doubles while full batches
+    finish in under half the target and halves when a batch goes over it.
+    """
+
+    def __init__(
+        self,
+        source,
+        sink,
+        model_loader: ModelLoader,
+        min_batch: int = 1,
+        max_batch: int = 512,
+        target_batch_ms: float = 50.0,
+        poll_timeout: float = 0.1,
+        retry_backoff: float = 0.1,
+        max_retry_backoff: float = 5.0,
+    ):
+        self.source = source
+        self.sink = sink
+        self.model_loader = model_loader
+        self.min_batch = min_batch
+        self.max_batch = max_batch
+        self.target_batch_ms = target_batch_ms
+        self.poll_timeout = poll_timeout
+        self.batch_size = min_batch
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        # Seconds run() waits before the next poll, set after a failed batch
+        self.retry_delay = 0.0
+        self._failures = 0
+        # A record that scored fine, used as a control when a single record fails
+        self._control = None
+
+    def _score(self, records: list[tuple[int, Optional[dict]]]) -> list[dict]:
+        """Validates, normalizes and scores a batch. Invalid records become error results."""
+        model_version = self.model_loader.metadata.get("model_version", "unknown")
+        results = []
+        valid = []
+
+        for offset, payload in records:
+            try:
+                if payload is None:
+                    raise ValueError("Event is not valid JSON")
+                req = normalize_request(PredictRequest.model_validate(payload))
+            except (ValidationError, ValueError) as e:
+                field_errors = []
+                if isinstance(e, ValidationError):
+                    for error in e.errors():
+                        field = ".".join(str(x) for x in error.get('loc', []))
+                        field_errors.append({"field": field, "issue": error.get('msg', 'Invalid request')})
+                else:
+                    field_errors.append({"field": "", "issue": str(e)})
+                results.append({
+                    "offset": offset,
+                    "status": "invalid",
+                    "request_id": payload.get("request_id") if isinstance(payload, dict) else None,
+                    "field_errors": field_errors,
+                })
+                continue
+            valid.append((offset, req))
+
+        if valid:
+            features_df = build_batch_features([build_feature_dict(req) for _, req in valid])
+            risk_proba = self.model_loader.model.predict_proba(features_df)
+            processed_at = datetime.now(timezone.utc).isoformat()
+
+            for (offset, req), proba in zip(valid, risk_proba):
+                risk_score = float(proba[1])
+                results.append({
+                    "offset": offset,
+                    "status": "ok",
+                    "request_id": req.request_id,
+                    "transaction_id": req.transaction.transaction_id,
+                    "decision": map_decision(risk_score),
+                    "risk_score": risk_score,
+                    "model_version": model_version,
+                    "processed_at": processed_at,
+                })
+
+        results.sort(key=lambda r: r["offset"])
+        return results
+
+    def _adapt(self, batch_len: int, elapsed_ms: float):
+        if elapsed_ms > self.target_batch_ms:
+            self.batch_size = max(self.min_batch, self.batch_size // 2)
+        elif batch_len == self.batch_size and elapsed_ms < self.target_batch_ms / 2:
+            self.batch_size = min(self.max_batch, self.batch_size * 2)
+
+    def _dead_letter(self, record: tuple[int, Optional[dict]], error: Exception) -> dict:
+        offset, payload = record
+        return {
+            "offset": offset,
+            "status": "error",
+            "request_id": payload.get("request_id") if isinstance(payload, dict) else None,
+            "error": f"{type(error).__name__}: {str(error)}",
+        }
+
+    def _control_scores(self, record: tuple[int, Optional[dict]]) -> bool:
+        """Tells a poison record from a model outage by scoring a different record.
+
+        Leaves the source positioned just after the failing record, as it was.
+        """
+        self.source.rewind()
+        polled = self.source.poll(2)
+        self.source.rewind()
+        self.source.poll(1)
+
+        controls = [r for r in polled if r[0] != record[0]]
+        if self._control is not None:
+            controls.append(self._control)
+        for control in controls:
+            try:
+                result = self._score([control])[0]
+            except Exception:
+                return False
+            # Invalid records never reach the model, so they prove nothing
+            if result["status"] == "ok":
+                return True
+        return False
+
+    def _retry_later(self):
+        """Rewinds the source and sets an exponential backoff for the next attempt."""
+        self.source.rewind()
+        self._failures += 1
+        self.retry_delay = min(self.max_retry_backoff, self.retry_backoff * 2 ** (self._failures - 1))
+
+    def run_once(self) -> int:
+        """Processes one micro-batch. Returns the number of records handled."""
+        records = self.source.poll(self.batch_size, timeout=self.poll_timeout)
+        if not records:
+            consumer_lag.set(self.source.lag())
+            return 0
+
+        start = time.perf_counter()
+        try:
+            results = self._score(records)
+        except Exception as e:
+            if len(records) == 1 and self._control_scores(records[0]):
+                logger.error(f"Dead-lettering record at offset {records[0][0]}: {str(e)}")
+                results = [self._dead_letter(records[0], e)]
+            elif len(records) == 1:
+                logger.error(f"Scoring is failing for every record, retrying offset {records[0][0]}: {str(e)}")
+                consumer_records_total.labels(status="retried").inc()
+                self._retry_later()
+                return 0
+            else:
+                self.batch_size = max(1, len(records) // 2)
+                logger.error(
+                    f"Consumer batch failed, retrying {len(records)} records in batches of {self.batch_size}: {str(e)}"
+                )
+                consumer_records_total.labels(status="retried").inc(len(records))
+                self._retry_later()
+                return 0
+
+        try:
+            self.sink.publish(results)
+        except Exception as e:
+            logger.error(f"Publishing batch failed, redelivering {len(records)} records: {str(e)}")
+            consumer_records_total.labels(status="retried").inc(len(records))
+            self._retry_later()
+            return 0
+
+        self.source.commit()
+        for record, result in zip(records, results):
+            if result["status"] == "ok":
+                self._control = record
+                break
+        self._failures = 0
+        self.retry_delay = 0.0
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        for result in results:
+            consumer_records_total.labels(status=result["status"]).inc()
+        consumer_batch_size.observe(len(records))
+        consumer_batch_latency_ms.observe(elapsed_ms)
+        consumer_lag.set(self.source.lag())
+
+        self._adapt(len(records), elapsed_ms)
+        return len(records)
+
+    def run(self, stop: threading.Event, idle_exit: bool = False):
+        """Consumes until stop is set. With idle_exit, also stops once the source is drained."""
+        while not stop.is_set():
+            handled = self.run_once()
+            if self.retry_delay > 0:
+                stop.wait(self.retry_delay)
+            elif handled == 0 and idle_exit and self.source.lag() == 0:
+                return
+
+
+def _run_partition(
+    input_path: str,
+    output_path: str,
+    partition: int,
+    partitions: int,
+    follow: bool,
+    metrics_port: Optional[int] = None,
+):
+    from src.stream.sources import FileLogSource, FileSink
+
+    if metrics_port:
+        # One registry per process, so each partition serves its own port
+        start_http_server(metrics_port + partition)
+
+    model_loader = ModelLoader()
+    model_loader.load_active_model()
+
+    source = FileLogSource(input_path, partition=partition, partitions=partitions)
+    sink = FileSink(f"{output_path}.{partition}" if partitions > 1 else output_path)
+    consumer = StreamConsumer(source, sink, model_loader)
+    try:
+        consumer.run(threading.Event(), idle_exit=not follow)
+    finally:
+        source.close()
+        sink.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score transaction events from a file-backed log")
+    parser.add_argument("input", help="JSON lines file of PredictRequest events")
+    parser.add_argument("output", help="JSON lines file for results")
+    parser.add_argument("--workers", type=int, default=1, help="Number of consumer processes (partitions)")
+    parser.add_argument("--follow", action="store_true", help="Keep waiting for new events instead of exiting")
+    parser.add_argument(
+        "--metrics-port", type=int, default=9100,
+        help="Partition N serves Prometheus metrics on this port + N (0 disables)"
+    )
+    args = parser.parse_args()
+
+    processes = [
+        multiprocessing.Process(
+            target=_run_partition,
+            args=(args.input, args.output, partition, args.workers, args.follow, args.metrics_port),
+        )
+        for partition in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
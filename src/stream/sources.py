@@ -0,0 +1,174 @@
+import json
+import os
+import queue
+import time
+from collections import deque
+from pathlib import Path
+from typing import Optional
+
+
+class FileLogSource:
+    """Reads transaction events from a JSON lines file, the local stand-in for a broker topic.
+
+    Offsets are line numbers. The committed position (line and byte offset) is
+    stored next to the log, so a restarted consumer resumes where the last
+    commit left off and replays anything polled but not committed. With
+    partitions > 1 each consumer only takes lines where line % partitions == partition.
+    """
+
+    def __init__(self, path: str, offsets_path: Optional[str] = None, partition: int = 0, partitions: int = 1):
+        self.path = Path(path)
+        self.partition = partition
+        self.partitions = partitions
+        self.offsets_path = Path(offsets_path) if offsets_path else self.path.with_name(
+            f"{self.path.name}.offset.{partition}"
+        )
+
+        self.committed_line = 0
+        self.committed_position = 0
+        if self.offsets_path.exists():
+            with open(self.offsets_path, 'r') as f:
+                saved = json.load(f)
+            self.committed_line = saved["line"]
+            self.committed_position = saved["position"]
+
+        self._file = open(self.path, 'rb')
+        self._counted_position = self.committed_position
+        self._total_lines = self.committed_line
+        self.rewind()
+
+    def poll(self, max_records: int, timeout: float = 0.0) -> list[tuple[int, Optional[dict]]]:
+        """Returns up to max_records (offset, payload) pairs. Unparseable lines have payload None."""
+        records = []
+        deadline = time.monotonic() + timeout
+        while len(records) < max_records:
+            position = self._file.tell()
+            line = self._file.readline()
+            if not line.endswith(b"\n"):
+                # Nothing new yet, or a line that is still being written
+                self._file.seek(position)
+                if records or time.monotonic() >= deadline:
+                    break
+                time.sleep(0.005)
+                continue
+
+            line_no = self._line
+            self._line += 1
+            if line_no % self.partitions != self.partition:
+                continue
+            try:
+                payload = json.loads(line)
+            except json.JSONDecodeError:
+                payload = None
+            records.append((line_no, payload))
+        return records
+
+    def commit(self):
+        """Marks everything polled so far as processed and persists the position."""
+        self.committed_line = self._line
+        self.committed_position = self._file.tell()
+        tmp_path = self.offsets_path.with_name(self.offsets_path.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump({"line": self.committed_line, "position": self.committed_position}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.offsets_path)
+
+    def rewind(self):
+        """Goes back to the last committed position so uncommitted records are redelivered."""
+        self._file.seek(self.committed_position)
+        self._line = self.committed_line
+
+    def lag(self) -> int:
+        """Approximate number of records in this partition not yet committed."""
+        with open(self.path, 'rb') as f:
+            f.seek(self._counted_position)
+            chunk = f.read()
+        # Only count complete lines; a partial tail is counted on a later call
+        last_newline = chunk.rfind(b"\n")
+        if last_newline >= 0:
+            self._total_lines += chunk.count(b"\n")
+            self._counted_position += last_newline + 1
+        return self._partition_lines(self._total_lines) - self._partition_lines(self.committed_line)
+
+    def _partition_lines(self, lines: int) -> int:
+        """Number of lines among the first `lines` that belong to this partition."""
+        if lines <= self.partition:
+            return 0
+        return (lines - self.partition + self.partitions - 1) // self.partitions
+
+    def close(self):
+        self._file.close()
+
+
+class QueueSource:
+    """In-process queue source. Polled records stay in flight until commit; rewind redelivers them."""
+
+    def __init__(self, source_queue: queue.Queue):
+        self._queue = source_queue
+        self._redeliver = deque()
+        self._in_flight = []
+        self._next_offset = 0
+
+    def poll(self, max_records: int, timeout: float = 0.0) -> list[tuple[int, Optional[dict]]]:
+        records = []
+        while self._redeliver and len(records) < max_records:
+            records.append(self._redeliver.popleft())
+
+        while len(records) < max_records:
+            try:
+                if records or timeout <= 0:
+                    payload = self._queue.get_nowait()
+                else:
+                    payload = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            records.append((self._next_offset, payload))
+            self._next_offset += 1
+
+        self._in_flight.extend(records)
+        return records
+
+    def commit(self):
+        self._in_flight = []
+
+    def rewind(self):
+        self._redeliver.extendleft(reversed(self._in_flight))
+        self._in_flight = []
+
+    def lag(self) -> int:
+        return self._queue.qsize() + len(self._redeliver) + len(self._in_flight)
+
+    def close(self):
+        pass
+
+
+class FileSink:
+    """Appends scoring results as JSON lines and fsyncs before returning."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding="utf-8")
+
+    def publish(self, results: list[dict]):
+        self._file.write("".join(json.dumps(r, separators=(",", ":"), default=str) + "\n" for r in results))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class QueueSink:
+    """Publishes scoring results to an in-process queue."""
+
+    def __init__(self, sink_queue: queue.Queue):
+        self._queue = sink_queue
+
+    def publish(self, results: list[dict]):
+        for result in results:
+            self._queue.put(result)
+
+    def close(self):
+        pass
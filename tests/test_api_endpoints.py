@@ -5,7 +5,7 @@ These tests verify that all endpoints behave correctly:
 - /health always returns 200
 - /ready returns correct status based on model state
 - /model returns model metadata
-- /predict handles valid/invalid requests correctly
+- /predict handles valid/invalid requests correctly, in standard and reuse pipeline mode
 """
 
 import pytest
@@ -124,6 +124,33 @@ def test_predict_normalizes_input():
     assert response.status_code == 200
 
 
+def test_predict_in_reuse_mode_keeps_each_request_separate(monkeypatch):
+    """Test that /predict works with PIPELINE_MODE=reuse and audit records do not share reused state."""
+    import src.api.main as main
+    monkeypatch.setattr(main, "pipeline_mode", "reuse")
+    audited = []
+    monkeypatch.setattr(main.audit_sink, "enqueue", audited.append)
+
+    for i, country in enumerate(["us", "de"]):
+        response = client.post("/predict", json={
+            "request_id": f"123e4567-e89b-12d3-a456-42661417400{i}",
+            "event_time": "2026-01-31T10:00:00Z",
+            "transaction": {
+                "transaction_id": f"txn_reuse_{i}",
+                "user_id": "user_123",
+                "amount": 100.0 + i,
+                "currency": "usd",
+                "country": country,
+            }
+        })
+        assert response.status_code == 200
+        assert response.json()["decision"] == "review"
+
+    assert [r["features"]["country"] for r in audited] == ["US", "DE"]
+    assert [r["transaction"]["amount"] for r in audited] == [100.0, 101.0]
+    assert audited[0]["features"]["merchant_category"] == "unknown"
+
+
 def test_metrics_endpoint_returns_prometheus_format():
     """Test that the /metrics endpoint returns Prometheus formatted metrics."""
     response = client.get("/metrics")
@@ -132,4 +159,101 @@ def test_metrics_endpoint_returns_prometheus_format():
     content = response.text
     assert "# HELP" in content
     assert "# TYPE" in content
-    assert "model_loaded" in content
\ No newline at end of file
+    assert "model_loaded" in content
+
+def test_monitoring_endpoint_reports_windows():
+    """Test that the /monitoring endpoint returns the current window summary."""
+    response = client.get("/monitoring")
+    assert response.status_code == 200
+
+    data = response.json()
+    assert "current" in data
+    assert "risk_score" in data["current"]["numeric"]
+
+
+def test_predict_uses_fallback_when_model_is_slow():
+    """Test that /predict answers with the fallback scorer and flags it when the model is too slow."""
+    import time
+    import numpy as np
+    from src.api.main import budgeted_inference
+
+    class SlowModel:
+        def predict_proba(self, input_data):
+            time.sleep(0.2)
+            return np.array([[0.0, 1.0]])
+
+    request = {
+        "request_id": "123e4567-e89b-12d3-a456-426614174000",
+        "event_time": "2026-01-31T10:00:00Z",
+        "transaction": {
+            "transaction_id": "txn_001",
+            "user_id": "user_123",
+            "amount": 100.0,
+            "currency": "USD",
+            "country": "US",
+        }
+    }
+
+    original_model, original_budget = model_loader.model, budgeted_inference.budget_ms
+    model_loader.model, budgeted_inference.budget_ms = SlowModel(), 20
+    try:
+        response = client.post("/predict", json=request)
+    finally:
+        model_loader.model, budgeted_inference.budget_ms = original_model, original_budget
+
+    assert response.status_code == 200
+    assert response.json()["fallback_used"] is True
+    assert response.json()["decision"] == "review"
+
+
+def test_predict_explanation_only_when_requested():
+    """Test that /predict includes an explanation only with explain=true."""
+    request = {
+        "request_id": "123e4567-e89b-12d3-a456-426614174000",
+        "event_time": "2026-01-31T10:00:00Z",
+        "transaction": {
+            "transaction_id": "txn_001",
+            "user_id": "user_123",
+            "amount": 100.0,
+            "currency": "USD",
+            "country": "US",
+        }
+    }
+
+    plain = client.post("/predict", json=request)
+    assert plain.json()["explanation"] is None
+
+    explained = client.post("/predict?explain=true", json=request)
+    assert explained.status_code == 200
+    assert "amount" in explained.json()["explanation"]["contributions"]
+
+
+def test_explain_unknown_request_returns_404():
+    """Test that /explain/{request_id} returns 404 when there is no audit record."""
+    response = client.get("/explain/00000000-0000-0000-0000-000000000000")
+    assert response.status_code == 404
+
+
+def test_debug_memory_disabled_by_default():
+    """Test that the memory debug surface is off unless MEMORY_PROFILING=1."""
+    response = client.get("/debug/memory")
+    assert response.status_code == 404
+
+
+def test_drift_gauges_drop_features_no_longer_reported():
+    """Test that refreshing the monitoring gauges clears labels from an earlier baseline."""
+    from prometheus_client import REGISTRY
+    from src.api.main import drift_monitor, refresh_monitoring_metrics
+
+    saved = drift_monitor.baseline
+    try:
+        drift_monitor.baseline = {"features": {"country": {"proportions": {"US": 1.0}}}}
+        drift_monitor.observe({"amount": 10.0, "country": "DE"}, 0.5, "review")
+        refresh_monitoring_metrics()
+        assert REGISTRY.get_sample_value("feature_drift_psi", {"feature": "country"}) is not None
+
+        drift_monitor.baseline = None
+        refresh_monitoring_metrics()
+        assert REGISTRY.get_sample_value("feature_drift_psi", {"feature": "country"}) is None
+    finally:
+        drift_monitor.baseline = saved
@@ -0,0 +1,212 @@
+"""
+Unit tests for the prediction audit log.
+
+These tests verify that records are written in batches, segments rotate and get
+compressed, lookups work across open and closed segments, a full queue drops
+instead of blocking, segments left open by a crash are recovered and writer
+failures are retried (but do not hang stop()), processes sharing a directory never recover each
+other's live segments, per-segment .idx files from older versions are imported
+into the shared index and segments past retention are deleted.
+"""
+
+import json
+import sqlite3
+import time
+from prometheus_client import REGISTRY
+from src.api.audit import AuditSink, encode_record, read_segment
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def make_record(i):
+    return {
+        "request_id": f"req-{i}",
+        "transaction_id": f"txn-{i % 3}",
+        "risk_score": 0.5,
+        "decision": "review",
+    }
+
+
+def test_records_are_written_and_looked_up(tmp_path):
+    """Test that enqueued records are persisted and found by request_id."""
+    sink = AuditSink(directory=str(tmp_path), flush_interval=0.01)
+    sink.start()
+    for i in range(10):
+        assert sink.enqueue(make_record(i))
+    sink.stop()
+
+    records = sink.lookup(request_id="req-4")
+    assert len(records) == 1
+    assert records[0]["transaction_id"] == "txn-1"
+
+
+def test_lookup_by_transaction_id_returns_all_matches(tmp_path):
+    """Test that lookup by transaction_id returns every record for that transaction."""
+    sink = AuditSink(directory=str(tmp_path), flush_interval=0.01)
+    sink.start()
+    for i in range(9):
+        sink.enqueue(make_record(i))
+    sink.stop()
+
+    records = sink.lookup(transaction_id="txn-0")
+    assert sorted(r["request_id"] for r in records) == ["req-0", "req-3", "req-6"]
+
+
+def test_segments_rotate_by_size_and_are_compressed(tmp_path):
+    """Test that small max_segment_bytes produces several gzipped, indexed segments."""
+    sink = AuditSink(directory=str(tmp_path), flush_interval=0.01, batch_size=2, max_segment_bytes=200)
+    sink.start()
+    for i in range(20):
+        sink.enqueue(make_record(i))
+    sink.stop()
+
+    segments = sorted(tmp_path.glob("segment-*.log.gz"))
+    assert len(segments) > 1
+    assert not list(tmp_path.glob("segment-*.log"))
+    indexed = sqlite3.connect(tmp_path / "index.sqlite").execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+    assert indexed == len(segments)
+
+    total = sum(1 for path in segments for _ in read_segment(path))
+    assert total == 20
+    assert sink.lookup(request_id="req-19")[0]["request_id"] == "req-19"
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    """Test that enqueue returns False rather than blocking when the queue is full."""
+    sink = AuditSink(directory=str(tmp_path), max_queue_size=2)
+
+    assert sink.enqueue(make_record(0))
+    assert sink.enqueue(make_record(1))
+    assert sink.enqueue(make_record(2)) is False
+
+
+def test_segment_left_by_crash_is_recovered_on_start(tmp_path):
+    """Test that a raw .log without an index (crashed writer) is indexed, compressed and searchable."""
+    orphan = tmp_path / "segment-00000000000000000001.log"
+    # Two complete records and a torn write at the tail
+    orphan.write_bytes(encode_record(make_record(1)) + encode_record(make_record(2)) + encode_record(make_record(3))[:7])
+
+    sink = AuditSink(directory=str(tmp_path), flush_interval=0.01)
+    sink.start()
+    wait_for(lambda: orphan.with_suffix(".log.gz").exists())
+    assert sink.lookup(request_id="req-2")[0]["transaction_id"] == "txn-2"
+    sink.stop()
+
+    assert not orphan.exists()
+    assert orphan.with_suffix(".log.gz").exists()
+    assert sink.lookup(request_id="req-1")[0]["request_id"] == "req-1"
+    assert sink.lookup(request_id="req-3") == []
+
+
+def test_writer_retries_after_write_failure(tmp_path):
+    """Test that a failing write is logged and retried instead of killing the writer thread."""
+    sink = AuditSink(directory=str(tmp_path), flush_interval=0.01, retry_interval=0.01)
+    write_batch = sink._write_batch
+    failures = []
+
+    def flaky_write_batch(batch):
+        if not failures:
+            failures.append(batch)
+            raise OSError(28, "No space left on device")
+        write_batch(batch)
+
+    sink._write_batch = flaky_write_batch
+    sink.start()
+    for i in range(5):
+        sink.enqueue(make_record(i))
+    sink.stop()
+
+    assert failures
+    assert sorted(r["request_id"] for r in sink.lookup(transaction_id="txn-1")) == ["req-1", "req-4"]
+    total = sum(1 for path in tmp_path.glob("segment-*.log.gz") for _ in read_segment(path))
+    assert total == 5
+
+
+def test_stop_gives_up_when_writes_keep_failing(tmp_path):
+    """Test that stop() returns and counts the unwritten records as dropped when every write fails."""
+    sink = AuditSink(directory=str(tmp_path), flush_interval=0.01, retry_interval=0.01, stop_retries=2)
+    attempts = []
+
+    def failing_write_batch(batch):
+        attempts.append(len(batch))
+        raise OSError(5, "Input/output error")
+
+    sink._write_batch = failing_write_batch
+    dropped = REGISTRY.get_sample_value("audit_records_dropped_total")
+    sink.start()
+    for i in range(5):
+        sink.enqueue(make_record(i))
+    wait_for(lambda: attempts)
+    sink.stop()
+
+    assert sink._queue.empty()
+    assert REGISTRY.get_sample_value("audit_records_dropped_total") - dropped == 5
+    assert sink.lookup(request_id="req-0") == []
+
+
+def test_sinks_sharing_a_directory_leave_live_segments_alone(tmp_path):
+    """Test that a second worker starting on the same directory does not recover the first one's open segment."""
+    first = AuditSink(directory=str(tmp_path), flush_interval=0.01)
+    first.start()
+    first.enqueue({"request_id": "a1", "transaction_id": "t"})
+    wait_for(lambda: first.lookup(request_id="a1"))
+
+    second = AuditSink(directory=str(tmp_path), flush_interval=0.01)
+    second.start()
+    second.enqueue({"request_id": "b1", "transaction_id": "t"})
+    first.enqueue({"request_id": "a2", "transaction_id": "t"})
+    wait_for(lambda: first.lookup(request_id="a2"))
+
+    first.stop()
+    second.stop()
+    assert [r["request_id"] for r in second.lookup(request_id="a2")] == ["a2"]
+    assert sorted(r["request_id"] for r in first.lookup(transaction_id="t")) == ["a1", "a2", "b1"]
+    assert sum(1 for path in tmp_path.glob("segment-*.log.gz") for _ in read_segment(path)) == 3
+    assert not list(tmp_path.glob("writer-*.lock"))
+
+
+def test_legacy_index_files_are_imported(tmp_path):
+    """Test that a closed segment with a per-segment .idx file stays searchable after the .idx is imported."""
+    first, second = encode_record(make_record(1)), encode_record(make_record(4))
+    raw = tmp_path / "segment-00000000000000000001.log"
+    raw.write_bytes(first + second)
+    AuditSink._compress(raw)
+    index = {
+        "request_id": {"req-1": [0], "req-4": [len(first)]},
+        "transaction_id": {"txn-1": [0, len(first)]},
+    }
+    raw.with_suffix(".idx").write_text(json.dumps(index))
+
+    sink = AuditSink(directory=str(tmp_path))
+    sink.start()
+    wait_for(lambda: not raw.with_suffix(".idx").exists())
+    sink.stop()
+
+    assert sorted(r["request_id"] for r in sink.lookup(transaction_id="txn-1")) == ["req-1", "req-4"]
+
+
+def test_segments_past_retention_are_deleted(tmp_path):
+    """Test that apply_retention deletes old segments and their index rows but keeps recent ones."""
+    sink = AuditSink(directory=str(tmp_path), flush_interval=0.01, max_segment_bytes=1, retention_seconds=3600)
+    sink.start()
+    sink.enqueue(make_record(1))
+    wait_for(lambda: len(list(tmp_path.glob("segment-*.log.gz"))) == 1)
+    sink.enqueue(make_record(2))
+    sink.stop()
+    assert len(list(tmp_path.glob("segment-*.log.gz"))) == 2
+
+    # Age the first segment past retention
+    db = sqlite3.connect(tmp_path / "index.sqlite")
+    with db:
+        db.execute("UPDATE segments SET closed_at = ? WHERE name = (SELECT MIN(name) FROM segments)", (time.time() - 7200,))
+
+    assert sink.apply_retention() == 1
+    assert sink.lookup(request_id="req-1") == []
+    assert sink.lookup(request_id="req-2")[0]["request_id"] == "req-2"
+    assert len(list(tmp_path.glob("segment-*.log.gz"))) == 1
+    assert db.execute("SELECT COUNT(*) FROM records WHERE key = 'req-1'").fetchone()[0] == 0
@@ -0,0 +1,140 @@
+"""
+Tests for traffic capture and replay.
+
+These tests verify that sampled requests are written with their session, arrival
+time, sample rate and routing headers (including requests rejected with 503),
+that sessions keep their own timelines on replay, that replay sends the captured
+headers again, and that the replay harness reports latency, errors, decision
+parity and load.
+"""
+
+import asyncio
+import json
+import httpx
+from fastapi.testclient import TestClient
+import src.api.main as main
+from src.api.capture import TrafficCapture, arrival_offsets, load_capture
+from src.api.main import app, model_loader
+from src.api.scheduler import LaneFull
+from src.api.replay import replay, percentile, load_summary
+
+
+def make_request(i):
+    return {
+        "request_id": f"123e4567-e89b-12d3-a456-4266141740{i:02d}",
+        "event_time": "2026-01-31T10:00:00Z",
+        "transaction": {
+            "transaction_id": f"txn_{i}",
+            "user_id": "user_123",
+            "amount": 100.0,
+            "currency": "USD",
+            "country": "US",
+        }
+    }
+
+
+def test_capture_respects_sample_rate_and_max_records(tmp_path):
+    """Test that capture is off at rate 0 and stops at max_records."""
+    off = TrafficCapture(path=str(tmp_path / "off.jsonl"), sample_rate=0.0)
+    assert off.sample() is None
+
+    capture = TrafficCapture(path=str(tmp_path / "capture.jsonl"), sample_rate=1.0, max_records=3)
+    for i in range(5):
+        arrival = capture.sample()
+        if arrival is not None:
+            capture.record(arrival, make_request(i), 200, {"decision": "review", "risk_score": 0.5})
+    capture.close()
+
+    records = load_capture(str(tmp_path / "capture.jsonl"))
+    assert len(records) == 3
+    assert records[0]["t"] <= records[1]["t"] <= records[2]["t"]
+    assert {r["session"] for r in records} == {capture.session}
+    assert all(r["sample_rate"] == 1.0 for r in records)
+
+
+def test_restart_and_workers_keep_their_own_timelines(tmp_path):
+    """Test that concurrent sessions interleave by wall clock and downtime between sessions is cut out."""
+    def line(session, ts, t):
+        return {"session": session, "ts": ts, "t": t, "sample_rate": 0.01,
+                "request": {}, "status_code": 200, "response": None}
+
+    path = tmp_path / "capture.jsonl"
+    records = [
+        # Two workers capturing at the same time, both starting their offsets at 0
+        line("w1", 1000.0, 0.0), line("w1", 1002.0, 2.0),
+        line("w2", 1001.0, 0.0), line("w2", 1003.0, 2.0),
+        # A restart an hour later, offsets start at 0 again
+        line("w3", 4600.0, 0.0), line("w3", 4601.0, 1.0),
+    ]
+    path.write_text("".join(json.dumps(r) + "\n" for r in reversed(records)))
+
+    loaded = load_capture(str(path))
+    assert [r["session"] for r in loaded] == ["w1", "w2", "w1", "w2", "w3", "w3"]
+    assert arrival_offsets(loaded) == [0.0, 1.0, 2.0, 3.0, 3.0, 4.0]
+    assert len(load_capture(str(path), session="w3")) == 2
+
+    load = load_summary(loaded, 4.0, speed=1.0)
+    assert load["sessions"] == 3
+    assert load["offered_rps"] == 1.5
+    assert load["production_estimate_rps"] == 150.0
+
+
+def test_replay_reports_parity_against_in_process_app():
+    """Test that replaying against the in-process app reports full parity and no errors."""
+    model_loader.load_active_model()
+    records = [
+        {"t": i * 0.001, "request": make_request(i), "status_code": 200,
+         "response": {"decision": "review", "risk_score": 0.5}}
+        for i in range(10)
+    ]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            return await replay(records, client, speed=2.0)
+
+    report = asyncio.run(run())
+    assert report["requests"] == 10
+    assert report["error_rate"] == 0.0
+    assert report["decision_parity"] == 1.0
+    assert report["latency_ms"]["p99"] is not None
+
+
+def test_rejected_requests_are_captured_with_routing_headers(tmp_path, monkeypatch):
+    """Test that a LaneFull 503 is captured with X-Priority/X-API-Key and replay sends them again."""
+    model_loader.load_active_model()
+    capture = TrafficCapture(path=str(tmp_path / "capture.jsonl"), sample_rate=1.0)
+    monkeypatch.setattr(main, "traffic_capture", capture)
+
+    def lane_full(*args, **kwargs):
+        raise LaneFull("lane batch is full")
+
+    monkeypatch.setattr(main.budgeted_inference, "score", lane_full)
+    headers = {"X-Priority": "batch", "X-API-Key": "rescoring-job"}
+    response = TestClient(app).post("/predict", json=make_request(1), headers=headers)
+    assert response.status_code == 503
+    capture.close()
+
+    records = load_capture(str(tmp_path / "capture.jsonl"))
+    assert len(records) == 1
+    assert records[0]["status_code"] == 503
+    assert records[0]["headers"] == headers
+
+    sent = []
+
+    class RecordingClient:
+        async def post(self, url, json, headers):
+            sent.append(headers)
+            return httpx.Response(503, json={"detail": "Service saturated"})
+
+    report = asyncio.run(replay(records, RecordingClient()))
+    assert sent == [headers]
+    assert report["status_mismatches"] == 0
+
+
+def test_percentile_nearest_rank():
+    """Test the nearest-rank percentile helper."""
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) is None
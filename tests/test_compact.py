@@ -0,0 +1,114 @@
+"""
+Unit tests for model compaction.
+
+These tests verify that compacted trees keep the same splits and decisions as the
+original sklearn models, including how missing values are routed, that the compacted
+model occupies less memory once loaded, that explanations still work, and that
+unsupported models are rejected.
+"""
+
+import pickle
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+from src.model.compact import CompactionUnsupported, check_parity, compact_model, measure
+from src.model.dummy_model import DummyModel
+from src.model.explain import explain_batch
+
+
+def training_data(n=500):
+    rng = np.random.default_rng(1)
+    X = pd.DataFrame({"amount": rng.uniform(1, 1000, n), "hour": rng.integers(0, 24, n).astype(float)})
+    y = ((X["amount"] > 500) ^ (X["hour"] < 6)).astype(int)
+    return X, y
+
+
+def test_forest_compaction_keeps_decisions_and_shrinks():
+    """Test that a compacted forest matches predict_proba and pickles smaller."""
+    X, y = training_data()
+    forest = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+    compact = compact_model(forest)
+
+    parity = check_parity(forest, compact, X)
+    assert parity["passed"]
+    assert parity["max_abs_score_diff"] < 1e-6
+    assert len(pickle.dumps(compact)) < len(pickle.dumps(forest))
+
+
+def test_measure_reports_memory_once_loaded():
+    """Test that measure() reports resident memory next to pickle size, and the compacted forest uses less."""
+    X, y = training_data()
+    forest = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X, y)
+    compact = compact_model(forest)
+
+    before = measure(forest, X, repeats=5)
+    after = measure(compact, X, repeats=5)
+    assert before["resident_bytes"] > 0 and before["pickled_bytes"] > 0
+    assert 0 < after["resident_bytes"] < before["resident_bytes"]
+
+
+def test_thresholds_split_exactly_like_sklearn():
+    """Test inputs sitting right at float32 neighbours of every threshold take the same branch."""
+    X, y = training_data()
+    tree = DecisionTreeClassifier(max_depth=8, random_state=0).fit(X, y)
+    compact = compact_model(tree)
+
+    internal = tree.tree_.feature >= 0
+    thresholds = tree.tree_.threshold[internal].astype(np.float32)
+    edge_values = np.concatenate([
+        thresholds,
+        np.nextafter(thresholds, np.float32(np.inf)),
+        np.nextafter(thresholds, np.float32(-np.inf)),
+    ]).astype(np.float64)
+    edges = pd.DataFrame({"amount": edge_values, "hour": edge_values})
+
+    assert np.array_equal(tree.predict_proba(edges)[:, 1], compact.predict_proba(edges)[:, 1].astype(np.float32))
+
+
+def test_missing_values_are_routed_like_sklearn():
+    """Test that NaN inputs follow the learned missing-value direction of every split."""
+    X, y = training_data(2000)
+    rng = np.random.default_rng(2)
+    X_missing = X.mask(rng.random(X.shape) < 0.2)
+    # Make missingness informative so splits learn to send NaNs left
+    y = np.where(X_missing["amount"].isna(), 1 - y, y)
+    forest = RandomForestClassifier(n_estimators=20, max_depth=6, random_state=0).fit(X_missing, y)
+    assert any(t.tree_.missing_go_to_left.any() for t in forest.estimators_)
+
+    compact = compact_model(forest)
+    parity = check_parity(forest, compact, X_missing)
+    assert parity["passed"]
+    assert parity["max_abs_score_diff"] < 1e-6
+
+
+def test_quantized_values_stay_close():
+    """Test that uint16 leaf values keep scores within quantization error."""
+    X, y = training_data()
+    forest = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0).fit(X, y)
+    compact = compact_model(forest, value_dtype="uint16")
+
+    assert check_parity(forest, compact, X)["max_abs_score_diff"] < 1e-4
+
+
+def test_compact_explanations_match_original():
+    """Test that compacted models explain the same way as the original trees."""
+    X, y = training_data()
+    forest = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(X, y)
+    compact = compact_model(forest)
+
+    original = explain_batch(forest, X.head(10))
+    compacted = explain_batch(compact, X.head(10))
+    for a, b in zip(original, compacted):
+        assert a["base_value"] == pytest.approx(b["base_value"], abs=1e-6)
+        assert a["contributions"]["amount"] == pytest.approx(b["contributions"]["amount"], abs=1e-6)
+
+
+def test_unsupported_models_are_rejected():
+    """Test that non-tree and boosted models are not compacted."""
+    X, y = training_data(100)
+    with pytest.raises(CompactionUnsupported):
+        compact_model(DummyModel())
+    with pytest.raises(CompactionUnsupported):
+        compact_model(GradientBoostingClassifier(n_estimators=2).fit(X, y))
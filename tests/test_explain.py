@@ -0,0 +1,87 @@
+"""
+Unit tests for on-demand explanations.
+
+These tests verify that path-based tree contributions and coefficient-based linear
+contributions add up to the model output, and that the cache is keyed on
+model_version and feature vector.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from src.model.dummy_model import DummyModel
+from src.model.explain import ExplanationCache, ExplanationUnavailable, explain, explain_batch
+
+
+def training_data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"amount": rng.uniform(1, 1000, 300), "hour": rng.integers(0, 24, 300)})
+    y = ((X["amount"] > 500) ^ (X["hour"] < 6)).astype(int)
+    return X, y
+
+
+def reconstructed(explanations):
+    return np.array([e["base_value"] + sum(e["contributions"].values()) for e in explanations])
+
+
+def test_tree_contributions_sum_to_probability():
+    """Test that bias + contributions equals predict_proba for a tree and a forest."""
+    X, y = training_data()
+    for model in (DecisionTreeClassifier(max_depth=4).fit(X, y),
+                  RandomForestClassifier(n_estimators=5, max_depth=3, random_state=0).fit(X, y)):
+        explanations = explain_batch(model, X.head(20))
+        assert np.allclose(reconstructed(explanations), model.predict_proba(X.head(20))[:, 1])
+        assert explanations[0]["method"] == "tree_path"
+
+
+def test_gradient_boosting_contributions_sum_to_log_odds():
+    """Test that boosted tree contributions add up to the decision function."""
+    X, y = training_data()
+    model = GradientBoostingClassifier(n_estimators=10, max_depth=2).fit(X, y)
+
+    explanations = explain_batch(model, X.head(20))
+    assert np.allclose(reconstructed(explanations), model.decision_function(X.head(20)))
+
+
+def test_linear_contributions_are_coefficient_times_value():
+    """Test coefficient-based contributions for a logistic regression."""
+    X, y = training_data()
+    model = LogisticRegression().fit(X, y)
+
+    explanation = explain(model, X.head(1))
+    assert explanation["contributions"]["amount"] == pytest.approx(model.coef_[0][0] * X["amount"].iloc[0])
+    assert reconstructed([explanation])[0] == pytest.approx(model.decision_function(X.head(1))[0])
+
+
+def test_unsupported_model_raises():
+    """Test that models without a known structure are rejected."""
+    class Opaque:
+        pass
+
+    with pytest.raises(ExplanationUnavailable):
+        explain(Opaque(), pd.DataFrame({"amount": [1.0]}))
+
+
+def test_cache_computes_once_per_model_version_and_features():
+    """Test that repeated explanations hit the cache and model versions are kept apart."""
+    class CountingModel(DummyModel):
+        calls = 0
+
+        def explain(self, input_data):
+            CountingModel.calls += 1
+            return super().explain(input_data)
+
+    cache = ExplanationCache(max_entries=2)
+    model = CountingModel()
+    features = {"amount": 10.0, "country": "US"}
+    df = pd.DataFrame([features])
+
+    cache.get_or_compute(model, "v1", features, df)
+    cache.get_or_compute(model, "v1", dict(features), df)
+    assert CountingModel.calls == 1
+
+    cache.get_or_compute(model, "v2", features, df)
+    assert CountingModel.calls == 2
@@ -0,0 +1,122 @@
+"""
+Unit tests for the latency budget and fallback scorer.
+
+These tests verify that the fallback scorer gives scores in range, and that a
+model missing its budget is answered by the fallback (or times out without one).
+"""
+
+import time
+import numpy as np
+import pytest
+from src.model.fallback import FallbackScorer, load_fallback
+from src.model.features import features_to_frame
+from src.model.inference import BudgetedInference, InferenceTimeout
+
+
+class SlowModel:
+    def predict_proba(self, input_data):
+        time.sleep(0.2)
+        return np.array([[0.1, 0.9]])
+
+
+class FastModel:
+    def predict_proba(self, input_data):
+        return np.array([[0.8, 0.2]])
+
+
+FEATURES = {"amount": 100.0, "currency": "USD", "country": "NG",
+            "merchant_category": "unknown", "device_type": "mobile"}
+
+
+def test_fallback_scorer_uses_weights_and_tables():
+    """Test that numeric weights and categorical tables move the score."""
+    scorer = FallbackScorer(
+        intercept=-2.0,
+        numeric={"amount": {"weight": 0.1, "transform": "log1p"}},
+        categorical={"country": {"NG": 3.0}}
+    )
+    risky = scorer.score(FEATURES)
+    safe = scorer.score(dict(FEATURES, country="US"))
+
+    assert 0.0 <= safe < risky <= 1.0
+
+
+def test_load_fallback_missing_returns_none(tmp_path):
+    """Test that a model without fallback.json has no fallback."""
+    assert load_fallback(tmp_path) is None
+    assert load_fallback("models/v1") is not None
+
+
+def test_fast_model_answers_within_budget():
+    """Test that the primary model result is used when it is fast enough."""
+    inference = BudgetedInference(budget_ms=500)
+    score, used_fallback = inference.score(FastModel(), features_to_frame(FEATURES), FEATURES, FallbackScorer())
+
+    assert score == pytest.approx(0.2)
+    assert used_fallback is False
+
+
+def test_slow_model_falls_back_within_budget():
+    """Test that a slow model is replaced by the fallback without waiting for it."""
+    inference = BudgetedInference(budget_ms=20)
+    start = time.perf_counter()
+    score, used_fallback = inference.score(SlowModel(), features_to_frame(FEATURES), FEATURES, FallbackScorer())
+
+    assert used_fallback is True
+    assert score == pytest.approx(0.5)
+    assert time.perf_counter() - start < 0.15
+
+
+def test_slow_model_without_fallback_times_out():
+    """Test that InferenceTimeout is raised when there is nothing to fall back to."""
+    inference = BudgetedInference(budget_ms=20)
+    with pytest.raises(InferenceTimeout):
+        inference.score(SlowModel(), features_to_frame(FEATURES), FEATURES, None)
+
+
+def test_fit_fallback_distills_primary_model():
+    """Test that the fitted fallback tracks the primary model's scores, and is constant for a constant model."""
+    import pandas as pd
+    from src.model.fallback import fit_fallback
+
+    class CountryModel:
+        def predict_proba(self, input_data):
+            risk = np.where(input_data["country"] == "NG", 0.9, 0.1)
+            return np.column_stack([1 - risk, risk])
+
+    class ConstantModel:
+        def predict_proba(self, input_data):
+            return np.full((len(input_data), 2), 0.5)
+
+    rows = [dict(FEATURES, country=country, amount=float(10 + i)) for i in range(50) for country in ("NG", "US")]
+    features_df = pd.DataFrame(rows)
+
+    spec = fit_fallback(CountryModel(), features_df)
+    scorer = FallbackScorer(spec["intercept"], spec["numeric"], spec["categorical"])
+    assert scorer.score(FEATURES) > 0.7
+    assert scorer.score(dict(FEATURES, country="US")) < 0.3
+
+    constant = fit_fallback(ConstantModel(), features_df)
+    assert constant["intercept"] == pytest.approx(0.0)
+    assert constant["numeric"]["amount"]["weight"] == 0.0
+    assert constant["categorical"] == {}
+
+
+def test_timed_out_call_is_cancelled_before_it_runs():
+    """Test that a call still queued when the budget runs out is cancelled instead of piling up."""
+    calls = []
+
+    class CountingSlowModel:
+        def predict_proba(self, input_data):
+            calls.append(1)
+            time.sleep(0.1)
+            return np.array([[0.1, 0.9]])
+
+    inference = BudgetedInference(budget_ms=20, max_workers=1)
+    for _ in range(3):
+        _, used_fallback = inference.score(CountingSlowModel(), features_to_frame(FEATURES), FEATURES, FallbackScorer())
+        assert used_fallback is True
+    time.sleep(0.3)
+
+    # Only the first call got the single worker; the queued ones were cancelled on timeout
+    assert len(calls) == 1
@@ -0,0 +1,134 @@
+"""
+Unit tests for the online drift monitor.
+
+These tests verify that the sketches stay bounded, quantiles are close to the
+real values, windows rotate on time, and PSI is computed against a baseline.
+"""
+
+import json
+from src.api.monitoring import (
+    BinnedQuantileSketch,
+    HeavyHitterSketch,
+    DriftMonitor,
+    RISK_SCORE_EDGES,
+    OTHER_BUCKET,
+    psi,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def observe_many(monitor, n, amount=100.0, country="US", risk_score=0.1, decision="approve"):
+    for _ in range(n):
+        monitor.observe(
+            {"amount": amount, "currency": "USD", "country": country,
+             "merchant_category": "electronics", "device_type": "mobile"},
+            risk_score,
+            decision
+        )
+
+
+def test_quantile_sketch_approximates_median():
+    """Test that the binned sketch gives quantiles close to the real ones."""
+    sketch = BinnedQuantileSketch(RISK_SCORE_EDGES)
+    for i in range(1000):
+        sketch.add(i / 1000)
+
+    assert abs(sketch.quantile(0.5) - 0.5) < 0.05
+    assert abs(sketch.quantile(0.9) - 0.9) < 0.05
+    assert len(sketch.counts) == len(RISK_SCORE_EDGES) - 1
+
+
+def test_heavy_hitter_sketch_is_bounded():
+    """Test that the heavy hitter sketch keeps at most k values but finds the frequent one."""
+    sketch = HeavyHitterSketch(k=5)
+    for i in range(500):
+        sketch.add(f"rare_{i}")
+        sketch.add("frequent")
+
+    assert len(sketch.top) <= 5
+    assert "frequent" in sketch.top
+    assert OTHER_BUCKET in sketch.proportions()
+
+
+def test_psi_is_zero_for_identical_distributions():
+    """Test that PSI is zero when nothing has shifted."""
+    assert psi([0.5, 0.5], [0.5, 0.5]) == 0.0
+    assert psi([0.9, 0.1], [0.1, 0.9]) > 0.25
+
+
+def test_window_rotates_after_window_seconds():
+    """Test that the current window becomes the previous one after window_seconds."""
+    clock = FakeClock()
+    monitor = DriftMonitor(window_seconds=60, clock=clock)
+    observe_many(monitor, 10)
+
+    clock.now = 61
+    observe_many(monitor, 3)
+
+    snapshot = monitor.snapshot()
+    assert snapshot["previous"]["count"] == 10
+    assert snapshot["current"]["count"] == 3
+
+
+def test_drift_against_baseline(tmp_path):
+    """Test that PSI is reported per feature once a baseline is loaded."""
+    clock = FakeClock()
+    monitor = DriftMonitor(window_seconds=60, clock=clock)
+    observe_many(monitor, 100, country="US", risk_score=0.1)
+    (tmp_path / "baseline.json").write_text(json.dumps(monitor.export_baseline()))
+
+    shifted = DriftMonitor(window_seconds=60, clock=clock)
+    shifted.load_baseline(tmp_path)
+    observe_many(shifted, 100, country="DE", risk_score=0.9, decision="decline")
+
+    drift = shifted.drift()
+    assert drift["risk_score"] > 0.25
+    assert drift["country"] > 0.25
+    assert drift["amount"] < 0.01
+
+
+def test_drift_empty_without_baseline(tmp_path):
+    """Test that no drift is reported when the model has no baseline.json."""
+    monitor = DriftMonitor()
+    monitor.load_baseline(tmp_path)
+    observe_many(monitor, 10)
+
+    assert monitor.drift() == {}
+    assert monitor.snapshot()["baseline_loaded"] is False
+
+
+def test_save_baseline_writes_and_loads(tmp_path):
+    """Test that save_baseline writes baseline.json that a fresh monitor can load."""
+    monitor = DriftMonitor()
+    observe_many(monitor, 50)
+    baseline = monitor.save_baseline(tmp_path)
+
+    assert baseline["count"] == 50
+    assert monitor.snapshot()["baseline_loaded"] is True
+
+    reloaded = DriftMonitor()
+    reloaded.load_baseline(tmp_path)
+    assert reloaded.baseline == json.loads((tmp_path / "baseline.json").read_text())
+    observe_many(reloaded, 50)
+    assert reloaded.drift()["amount"] < 0.01
+
+
+def test_drift_skips_numeric_baseline_with_other_edges(tmp_path):
+    """Test that numeric PSI is skipped when the baseline was binned with different edges."""
+    monitor = DriftMonitor()
+    observe_many(monitor, 50)
+    baseline = monitor.export_baseline()
+    baseline["features"]["amount"]["edges"] = [e * 2 for e in baseline["features"]["amount"]["edges"]]
+    (tmp_path / "baseline.json").write_text(json.dumps(baseline))
+
+    monitor.load_baseline(tmp_path)
+    drift = monitor.drift()
+    assert "amount" not in drift
+    assert "risk_score" in drift
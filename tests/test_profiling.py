@@ -0,0 +1,122 @@
+"""
+Unit tests for the memory profiling surface.
+
+These tests verify that profiling is a no-op when disabled, that per-stage
+numbers are only collected inside a serialized stage window, that snapshots and
+diffs are grouped by pipeline stage, that GC pauses are recorded, and that the
+model size reflects memory rather than file size.
+"""
+
+import gc
+import threading
+import tracemalloc
+import pytest
+from prometheus_client import REGISTRY
+from src.api.profiling import MemoryProfiler, install_gc_timing
+from src.api.schemas import PredictRequest
+from src.model.normalize import normalize_request
+
+
+@pytest.fixture
+def profiler():
+    profiler = MemoryProfiler(enabled=True)
+    yield profiler
+    tracemalloc.stop()
+
+
+def make_request():
+    return PredictRequest(
+        request_id="123e4567-e89b-12d3-a456-426614174000",
+        event_time="2026-01-30T10:00:00Z",
+        transaction={
+            "transaction_id": "txn_001",
+            "user_id": "user_123",
+            "amount": 100.0,
+            "currency": "usd",
+            "country": "us"
+        }
+    )
+
+
+def test_disabled_profiler_is_noop():
+    """Test that a disabled profiler does not start tracemalloc."""
+    profiler = MemoryProfiler(enabled=False)
+    profiler.begin().mark("normalize")
+    assert not tracemalloc.is_tracing()
+
+
+def test_stage_marks_record_metrics(profiler):
+    """Test that marking a stage observes the per-stage allocation histogram inside a stage window."""
+    assert profiler.begin() is profiler.begin()  # no window open: shared no-op
+
+    profiler.profile_stages(1)
+    before = REGISTRY.get_sample_value("stage_allocated_bytes_count", {"stage": "normalize"}) or 0
+    stages = profiler.begin()
+    kept = [normalize_request(make_request()) for _ in range(50)]
+    stages.mark("normalize")
+    stages.end()
+
+    assert REGISTRY.get_sample_value("stage_allocated_bytes_count", {"stage": "normalize"}) == before + 1
+    assert len(kept) == 50
+    # The window covered one request
+    profiler.begin().mark("normalize")
+    assert REGISTRY.get_sample_value("stage_allocated_bytes_count", {"stage": "normalize"}) == before + 1
+
+
+def test_stage_window_serializes_requests(profiler):
+    """Test that a second measured request waits until the first one ends."""
+    profiler.profile_stages(2)
+    first = profiler.begin()
+    second = []
+    waiter = threading.Thread(target=lambda: second.append(profiler.begin()))
+    waiter.start()
+    waiter.join(timeout=0.1)
+    assert waiter.is_alive()
+
+    first.end()
+    waiter.join(timeout=1)
+    assert not waiter.is_alive()
+    second[0].end()
+
+
+def test_diff_attributes_growth_to_stage(profiler):
+    """Test that allocations made in normalize.py show up under the normalize stage."""
+    profiler.snapshot()
+    kept = [normalize_request(make_request()) for _ in range(200)]
+    diff = profiler.diff()
+
+    assert diff["by_stage"]["normalize"]["size_bytes"] > 0
+    assert len(kept) == 200
+
+
+def test_gc_pauses_are_recorded():
+    """Test that a full collection is observed in gc_pause_ms."""
+    install_gc_timing()
+    install_gc_timing()
+    before = REGISTRY.get_sample_value("gc_pause_ms_count", {"generation": "2"}) or 0
+    gc.collect()
+    assert REGISTRY.get_sample_value("gc_pause_ms_count", {"generation": "2"}) == before + 1
+
+
+def test_model_size_is_measured_in_memory(tmp_path):
+    """Test that model_size_bytes reflects the unpickled model, not the pickle on disk."""
+    import json
+    import pickle
+    import numpy as np
+    from src.model.loader import ModelLoader
+
+    (tmp_path / "configs").mkdir()
+    (tmp_path / "configs" / "active_model.json").write_text(json.dumps({"active_model_version": "v9"}))
+    model_dir = tmp_path / "models" / "v9"
+    model_dir.mkdir(parents=True)
+    (model_dir / "meta.json").write_text(json.dumps({"model_version": "v9"}))
+    # Python ints take far more memory as objects than as pickled bytes
+    with open(model_dir / "model.pkl", 'wb') as f:
+        pickle.dump({"weights": np.zeros(100_000), "ids": list(range(100_000, 200_000))}, f)
+
+    loader = ModelLoader(models_dir=str(tmp_path / "models"), config_dir=str(tmp_path / "configs"))
+    loader.load_active_model()
+
+    assert loader.model_size_bytes >= 800_000 + 100_000 * 28
+    assert loader.model_size_bytes > 2 * (model_dir / "model.pkl").stat().st_size
+    assert not tracemalloc.is_tracing()
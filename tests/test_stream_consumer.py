@@ -0,0 +1,209 @@
+"""
+Tests for the stream consumer.
+
+These tests verify that events are scored in batches with the same decision code
+as /predict, that invalid events become error results, that failed batches are
+redelivered (at-least-once), that a record which breaks scoring is isolated and
+dead-lettered while a model outage is retried without dead-lettering anything,
+and that file offsets survive a restart.
+"""
+
+import json
+import queue
+import threading
+import numpy as np
+from src.model.loader import ModelLoader
+from src.stream.consumer import StreamConsumer
+from src.stream.sources import FileLogSource, FileSink, QueueSource, QueueSink
+
+
+def make_event(i, amount=100.0):
+    return {
+        "request_id": f"123e4567-e89b-12d3-a456-4266141740{i:02d}",
+        "event_time": "2026-01-31T10:00:00Z",
+        "transaction": {
+            "transaction_id": f"txn_{i}",
+            "user_id": "user_123",
+            "amount": amount,
+            "currency": "usd",
+            "country": "us",
+        }
+    }
+
+
+def loaded_model():
+    loader = ModelLoader()
+    loader.load_active_model()
+    return loader
+
+
+class FlakySink:
+    def __init__(self):
+        self.calls = 0
+        self.results = []
+
+    def publish(self, results):
+        self.calls += 1
+        if self.calls == 1:
+            raise IOError("broker unavailable")
+        self.results.extend(results)
+
+
+def test_queue_consumer_scores_and_rejects_invalid():
+    """Test that valid events are scored and invalid ones are published as errors."""
+    events, results = queue.Queue(), queue.Queue()
+    for i in range(5):
+        events.put(make_event(i))
+    events.put(make_event(5, amount=-1.0))
+
+    consumer = StreamConsumer(QueueSource(events), QueueSink(results), loaded_model(), min_batch=8)
+    assert consumer.run_once() == 6
+
+    published = [results.get_nowait() for _ in range(6)]
+    assert [r["status"] for r in published] == ["ok"] * 5 + ["invalid"]
+    assert published[0]["decision"] == "review"
+    assert published[0]["model_version"] == "v1"
+    assert published[5]["field_errors"][0]["field"] == "transaction.amount"
+
+
+def test_failed_publish_is_redelivered():
+    """Test at-least-once delivery: a batch whose publish fails is retried, not lost."""
+    events = queue.Queue()
+    for i in range(3):
+        events.put(make_event(i))
+    sink = FlakySink()
+    source = QueueSource(events)
+
+    consumer = StreamConsumer(source, sink, loaded_model(), min_batch=8)
+    assert consumer.run_once() == 0
+    assert source.lag() == 3
+    assert consumer.run_once() == 3
+
+    assert [r["transaction_id"] for r in sink.results] == ["txn_0", "txn_1", "txn_2"]
+    assert source.lag() == 0
+
+
+class PoisonModel:
+    """Scores 0.5, except that any batch containing amount 666 fails."""
+
+    def predict_proba(self, input_data):
+        if (input_data["amount"] == 666.0).any():
+            raise ValueError("Predicted risk score is out of range: 1.7")
+        return np.full((len(input_data), 2), 0.5)
+
+
+def test_poison_record_is_isolated_and_dead_lettered():
+    """Test that a failing record is narrowed down by halving and published as an error without stalling."""
+    events, results = queue.Queue(), queue.Queue()
+    for i in range(8):
+        events.put(make_event(i, amount=666.0 if i == 5 else 100.0))
+    loader = loaded_model()
+    loader.model = PoisonModel()
+
+    consumer = StreamConsumer(QueueSource(events), QueueSink(results), loader, min_batch=8, retry_backoff=0.001)
+    consumer.run(threading.Event(), idle_exit=True)
+
+    published = sorted((results.get_nowait() for _ in range(8)), key=lambda r: r["offset"])
+    assert [r["status"] for r in published] == ["ok"] * 5 + ["error"] + ["ok"] * 2
+    assert published[5]["request_id"] == make_event(5)["request_id"]
+    assert "out of range" in published[5]["error"]
+    assert consumer.source.lag() == 0
+
+
+class OutageModel:
+    """Fails every call while down, then scores 0.5."""
+
+    def __init__(self):
+        self.down = True
+
+    def predict_proba(self, input_data):
+        if self.down:
+            raise ConnectionError("model server unavailable")
+        return np.full((len(input_data), 2), 0.5)
+
+
+def test_model_outage_backs_off_instead_of_dead_lettering():
+    """Test that when every record fails nothing is committed or dead-lettered, and scoring resumes after."""
+    events, results = queue.Queue(), queue.Queue()
+    for i in range(4):
+        events.put(make_event(i))
+    loader = loaded_model()
+    loader.model = OutageModel()
+    source = QueueSource(events)
+
+    consumer = StreamConsumer(source, QueueSink(results), loader, min_batch=4, retry_backoff=0.001)
+    for _ in range(6):
+        assert consumer.run_once() == 0
+    assert results.empty()
+    assert source.lag() == 4
+    assert consumer.retry_delay > 0
+
+    loader.model.down = False
+    consumer.run(threading.Event(), idle_exit=True)
+    published = [results.get_nowait() for _ in range(4)]
+    assert [r["status"] for r in published] == ["ok"] * 4
+    assert source.lag() == 0
+
+
+def test_poison_last_record_is_checked_against_an_earlier_one():
+    """Test that a failing record with nothing after it is dead-lettered once an earlier record scored."""
+    events, results = queue.Queue(), queue.Queue()
+    events.put(make_event(0))
+    events.put(make_event(1, amount=666.0))
+    loader = loaded_model()
+    loader.model = PoisonModel()
+
+    consumer = StreamConsumer(QueueSource(events), QueueSink(results), loader, min_batch=2, retry_backoff=0.001)
+    consumer.run(threading.Event(), idle_exit=True)
+
+    assert [results.get_nowait()["status"] for _ in range(2)] == ["ok", "error"]
+
+
+def test_batch_size_adapts_to_load():
+    """Test that full, fast batches grow the batch size up to max_batch."""
+    events = queue.Queue()
+    for i in range(64):
+        events.put(make_event(i))
+
+    consumer = StreamConsumer(QueueSource(events), QueueSink(queue.Queue()), loaded_model(),
+                              min_batch=1, max_batch=16, target_batch_ms=10_000)
+    consumer.run(threading.Event(), idle_exit=True)
+    assert consumer.batch_size == 16
+
+
+def test_file_source_resumes_from_committed_offset(tmp_path):
+    """Test that a restarted file consumer continues after the last commit."""
+    log = tmp_path / "events.jsonl"
+    log.write_text("".join(json.dumps(make_event(i)) + "\n" for i in range(4)))
+    output = tmp_path / "results.jsonl"
+
+    source = FileLogSource(str(log))
+    sink = FileSink(str(output))
+    StreamConsumer(source, sink, loaded_model(), min_batch=2, max_batch=2).run_once()
+    source.close()
+
+    with open(log, 'a') as f:
+        f.write(json.dumps(make_event(4)) + "\n")
+
+    source = FileLogSource(str(log))
+    assert source.lag() == 3
+    StreamConsumer(source, sink, loaded_model(), min_batch=8).run(threading.Event(), idle_exit=True)
+    source.close()
+    sink.close()
+
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["offset"] for r in lines] == [0, 1, 2, 3, 4]
+
+
+def test_file_source_partitions_split_lines(tmp_path):
+    """Test that partitions take disjoint lines of the log."""
+    log = tmp_path / "events.jsonl"
+    log.write_text("".join(json.dumps(make_event(i)) + "\n" for i in range(5)))
+
+    first = FileLogSource(str(log), partition=0, partitions=2)
+    second = FileLogSource(str(log), partition=1, partitions=2)
+
+    assert [offset for offset, _ in first.poll(10)] == [0, 2, 4]
+    assert [offset for offset, _ in second.poll(10)] == [1, 3]
+    assert first.lag() == 3
+    assert second.lag() == 2